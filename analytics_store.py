@@ -0,0 +1,141 @@
+"""
+Daily analytics rollups for Joker's Telegram Bot
+Array-backed per-day counters by suit combination and outcome, persisted to disk
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+from array import array
+from datetime import date
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Outcome columns: hit at offset 0-3, then failure
+OUTCOMES = ('✅0️⃣', '✅1️⃣', '✅2️⃣', '✅3️⃣', '❌')
+FAILED = len(OUTCOMES) - 1
+
+MAGIC = b'JKRA'
+HEADER_LENGTH = struct.Struct('<I')
+
+
+class DailyRollupStore:
+    """One uint32 row per day laid out as [combination * len(OUTCOMES) + outcome]"""
+
+    def __init__(self, path: str, save_interval: float = 10.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.combinations: List[str] = []
+        self.combination_index: Dict[str, int] = {}
+        self.days: Dict[int, array] = {}  # date ordinal -> counters
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.load()
+
+    def _column(self, combination: str) -> int:
+        """Index of a combination, widening every stored day when it is new"""
+        index = self.combination_index.get(combination)
+        if index is None:
+            index = len(self.combinations)
+            self.combinations.append(combination)
+            self.combination_index[combination] = index
+            for row in self.days.values():
+                row.extend([0] * len(OUTCOMES))
+        return index
+
+    def record(self, combination: str, outcome: int, day: Optional[date] = None) -> None:
+        """Count one resolved prediction (outcome 0-3 = hit offset, FAILED = failure)"""
+        index = self._column(combination)
+        ordinal = (day or date.today()).toordinal()
+        row = self.days.get(ordinal)
+        if row is None:
+            row = self.days[ordinal] = array('I', bytes(4 * len(self.combinations) * len(OUTCOMES)))
+        row[index * len(OUTCOMES) + outcome] += 1
+        self.dirty = True
+        if time.monotonic() - self.last_save >= self.save_interval:
+            self.save()
+
+    def last_days(self, days: int, today: Optional[date] = None) -> Dict[str, List[int]]:
+        """Per-combination outcome totals over the last N days, today included"""
+        last = (today or date.today()).toordinal()
+        width = len(OUTCOMES)
+        totals = array('I', bytes(4 * len(self.combinations) * width))
+        for ordinal in range(last - days + 1, last + 1):
+            row = self.days.get(ordinal)
+            if row is not None:
+                for position, count in enumerate(row):
+                    totals[position] += count
+        return {
+            combination: totals[index * width:(index + 1) * width].tolist()
+            for index, combination in enumerate(self.combinations)
+            if any(totals[index * width:(index + 1) * width])
+        }
+
+    def save(self) -> None:
+        """Write header and rows to a temporary file, then atomically replace the store"""
+        if not self.path:
+            return
+        ordinals = sorted(self.days)
+        header = json.dumps({'outcomes': len(OUTCOMES), 'combinations': self.combinations, 'days': ordinals}).encode('utf-8')
+        temporary_path = self.path + '.tmp'
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(temporary_path, 'wb') as f:
+                f.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+                for ordinal in ordinals:
+                    self.days[ordinal].tofile(f)
+            os.replace(temporary_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logger.error(f"Failed to save analytics rollups: {e}")
+        self.last_save = time.monotonic()
+
+    def load(self) -> None:
+        """Replace the in-memory rollups with the persisted ones, if any"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        self.combinations, self.combination_index, self.days = [], {}, {}
+        try:
+            with open(self.path, 'rb') as f:
+                if f.read(4) != MAGIC:
+                    raise ValueError("not an analytics rollup file")
+                (header_length,) = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))
+                header = json.loads(f.read(header_length))
+                if header['outcomes'] != len(OUTCOMES):
+                    raise ValueError(f"unexpected outcome count {header['outcomes']}")
+                self.combinations = list(header['combinations'])
+                self.combination_index = {combination: index for index, combination in enumerate(self.combinations)}
+                width = len(self.combinations) * len(OUTCOMES)
+                for ordinal in header['days']:
+                    row = array('I')
+                    row.fromfile(f, width)
+                    self.days[ordinal] = row
+            logger.info(f"Loaded analytics rollups for {len(self.days)} days from {self.path}")
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            logger.error(f"Failed to load analytics rollups from {self.path}: {e}")
+            self.combinations, self.combination_index, self.days = [], {}, {}
+            self._move_aside()
+
+    def _move_aside(self) -> None:
+        """Keep an unreadable store for inspection instead of overwriting it on the next save"""
+        aside_path = f"{self.path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+        try:
+            os.replace(self.path, aside_path)
+            logger.warning(f"Moved unreadable analytics rollups to {aside_path}, starting empty")
+        except OSError as e:
+            # Without moving it, saving would destroy the old history: keep this store read-only
+            logger.error(f"Failed to move {self.path} aside, analytics will not be saved: {e}")
+            self.path = ''
+
+    def snapshot(self) -> Dict:
+        """Size of the store for /metrics"""
+        return {
+            'days': len(self.days),
+            'combinations': len(self.combinations),
+            'unsaved_changes': self.dirty,
+        }
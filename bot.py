@@ -2,6 +2,7 @@
 Main bot class for Joker's Telegram Bot
 """
 
+import asyncio
 import logging
 import signal
 import sys
@@ -10,12 +11,20 @@ from telegram.ext import (
     filters, ContextTypes
 )
 from telegram import Update
-from config import BOT_TOKEN
+from config import BOT_TOKEN, PORT, PROFILE_MAX_SECONDS, MAX_CONCURRENT_SENDS
 from handlers import (
     handle_new_chat_members, start_command, help_command,
     about_command, dev_command, handle_message, handle_edited_message,
-    stats_command, deploy_command, error_handler
+    stats_command, deploy_command, profile_command, memprofile_command,
+    shadow_command, reload_command, flush_reordered_messages, error_handler
 )
+from card_predictor import card_predictor
+from diagnostics import DiagnosticsServer, add_profiling_routes
+from loop_watchdog import loop_watchdog, add_health_routes
+from load_shedding import load_shedder, install_log_shedding
+from prediction_engine import prediction_engine
+from command_coalescer import command_coalescer
+from fanout import prediction_fanout
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +34,13 @@ class TelegramBot:
     def __init__(self):
         """Initialize the bot"""
         self.application = None
+        self.background_tasks = []
+        self.diagnostics_server = DiagnosticsServer('0.0.0.0', PORT)
+        add_profiling_routes(self.diagnostics_server, card_predictor, PROFILE_MAX_SECONDS)
+        add_health_routes(self.diagnostics_server, loop_watchdog, self.is_ready)
+        self.diagnostics_server.register_metrics('load_shedding', load_shedder.snapshot)
+        self.diagnostics_server.register_metrics('reorder_buffer', prediction_engine.reorder.snapshot)
+        self.diagnostics_server.register_metrics('command_coalescer', command_coalescer.snapshot)
         self.setup_bot()
     
     def start(self):
@@ -51,28 +67,44 @@ class TelegramBot:
     def setup_bot(self):
         """Setup the bot application and handlers"""
         try:
+            track = loop_watchdog.track
+
             # Create application
-            self.application = Application.builder().token(BOT_TOKEN).build()
+            self.application = (
+                Application.builder()
+                .token(BOT_TOKEN)
+                # Room for concurrent prediction fan-out next to polling
+                .connection_pool_size(MAX_CONCURRENT_SENDS + 2)
+                .post_init(self.on_startup)
+                .post_stop(self.on_stop)
+                .post_shutdown(self.on_shutdown)
+                .build()
+            )
             
             # Add command handlers
-            self.application.add_handler(CommandHandler("start", start_command))
-            self.application.add_handler(CommandHandler("help", help_command))
-            self.application.add_handler(CommandHandler("about", about_command))
-            self.application.add_handler(CommandHandler("dev", dev_command))
-            self.application.add_handler(CommandHandler("stats", stats_command))
-            self.application.add_handler(CommandHandler("deploy", deploy_command))
+            self.application.add_handler(CommandHandler("start", track(start_command)))
+            self.application.add_handler(CommandHandler("help", track(help_command)))
+            self.application.add_handler(CommandHandler("about", track(about_command)))
+            self.application.add_handler(CommandHandler("dev", track(dev_command)))
+            self.application.add_handler(CommandHandler("stats", track(stats_command)))
+            self.application.add_handler(CommandHandler("deploy", track(deploy_command)))
+            # Profiles run for seconds: updates keep flowing meanwhile, so the hot path is what gets sampled
+            self.application.add_handler(CommandHandler("profile", track(profile_command), block=False))
+            self.application.add_handler(CommandHandler("memprofile", track(memprofile_command), block=False))
+            self.application.add_handler(CommandHandler("shadow", track(shadow_command)))
+            self.application.add_handler(CommandHandler("reload", track(reload_command)))
             
             # Add message handlers
             self.application.add_handler(
-                MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, handle_new_chat_members)
+                MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, track(handle_new_chat_members))
             )
             self.application.add_handler(
-                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, track(handle_message))
             )
             
             # Add edited message handler
             self.application.add_handler(
-                MessageHandler(filters.UpdateType.EDITED_MESSAGE, handle_edited_message)
+                MessageHandler(filters.UpdateType.EDITED_MESSAGE, track(handle_edited_message))
             )
             
             # Add error handler
@@ -83,5 +115,54 @@ class TelegramBot:
         except Exception as e:
             logger.error(f"Failed to setup bot: {e}")
             raise
-    
 
+    async def on_startup(self, application: Application) -> None:
+        """Start background services once the event loop is running"""
+        loop_watchdog.start()
+        load_shedder.attach(application)
+        install_log_shedding(load_shedder)
+        self.background_tasks.append(asyncio.create_task(self.flush_reorder_buffer(application)))
+        # SIGHUP reloads rules on the loop, so the swap always lands between two messages
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload_rules)
+        # The rollup store is attached by main() after the bot is built
+        if prediction_engine.analytics:
+            self.diagnostics_server.register_metrics('analytics', prediction_engine.analytics.snapshot)
+        try:
+            await self.diagnostics_server.start()
+        except OSError as e:
+            logger.error(f"Failed to start diagnostics server on port {PORT}: {e}")
+
+    async def on_stop(self, application: Application) -> None:
+        """Let predictions and edits still being delivered finish while the bot can still send"""
+        await prediction_fanout.drain()
+
+    async def on_shutdown(self, application: Application) -> None:
+        """Stop background services"""
+        await self.diagnostics_server.stop()
+        await loop_watchdog.stop()
+        for task in self.background_tasks:
+            task.cancel()
+        self.background_tasks.clear()
+        if prediction_engine.event_log:
+            prediction_engine.event_log.close()
+        if prediction_engine.analytics and prediction_engine.analytics.dirty:
+            prediction_engine.analytics.save()
+
+    def reload_rules(self) -> None:
+        """Reload prediction rules from the rules file"""
+        try:
+            prediction_engine.reload_rules()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to reload prediction rules, keeping current ones: {e}")
+
+    async def flush_reorder_buffer(self, application: Application) -> None:
+        """Periodically release game messages held for missing earlier games"""
+        flush = loop_watchdog.track(flush_reordered_messages)
+        while True:
+            await asyncio.sleep(0.2)
+            await flush(application.bot)
+
+    def is_ready(self) -> bool:
+        """Ready once the application is running and polling for updates"""
+        application = self.application
+        return bool(application and application.running and application.updater and application.updater.running)
@@ -4,20 +4,95 @@ Analyzes card combinations and makes predictions
 """
 
 import re
+import sys
 import logging
-from typing import Optional, Dict, List, Tuple
-from config import VALID_CARD_COMBINATIONS, CARD_SYMBOLS, PREDICTION_MESSAGE
+from collections import Counter
+from typing import Optional, Dict, List, NamedTuple, Tuple
+from prediction_rules import PredictionRules, PENDING_STATUS, default_rules
 
 logger = logging.getLogger(__name__)
 
+# Verification status shown in the prediction message, by hit offset
+STATUS_BY_OFFSET = {0: '✅0️⃣', 1: '✅1️⃣', 2: '✅2️⃣', 3: '✅3️⃣'}
+FAILED_STATUS = '❌⭕'
+
+GAME_NUMBER_PATTERN = re.compile(r'#[nN](\d+)')
+PARENTHESES_PATTERN = re.compile(r'\(([^)]+)\)')
+
+DEFAULT_RULES = default_rules()
+
+
+class ParsedGameMessage(NamedTuple):
+    """Everything the prediction rules need from one game message"""
+    game_number: int
+    suit_counts: Tuple[Tuple[int, ...], ...]  # per parentheses (first two), counts in card_symbols order
+    is_temporary: bool
+    is_final: bool
+    card_symbols: Tuple[str, ...] = DEFAULT_RULES.card_symbols  # symbol of each suit_counts column
+
+
+def parse_game_message(message: str, rules: Optional[PredictionRules] = None) -> Optional[ParsedGameMessage]:
+    """Parse a game message once so several rule sets can share the result"""
+    match = GAME_NUMBER_PATTERN.search(message)
+    if not match:
+        return None
+    rules = rules or DEFAULT_RULES
+    groups = PARENTHESES_PATTERN.findall(message)[:2]
+    suit_counts = tuple(tuple(group.count(symbol) for symbol in rules.card_symbols) for group in groups)
+    return ParsedGameMessage(
+        game_number=int(match.group(1)),
+        suit_counts=suit_counts,
+        is_temporary=any(emoji in message for emoji in rules.temporary_emojis),
+        is_final=any(emoji in message for emoji in rules.final_emojis),
+        card_symbols=rules.card_symbols,
+    )
+
+
+class PredictionRecord:
+    """Compact prediction entry; message texts are rendered on demand"""
+
+    __slots__ = ('game_number', 'combination', 'status', 'verification_count', 'template')
+
+    def __init__(self, game_number: int, combination: str, template: str):
+        self.game_number = game_number
+        self.combination = combination
+        self.status = 'pending'
+        self.verification_count = 0
+        self.template = template  # shared template string, kept so edits match the original message
+
+    @property
+    def predicted_from(self) -> int:
+        """Game number the prediction was made from"""
+        return self.game_number - 1
+
+    @property
+    def message_text(self) -> str:
+        """Original prediction message"""
+        return self.template.format(numero=self.game_number)
+
+    @property
+    def final_message(self) -> Optional[str]:
+        """Prediction message with its resolved status, None while pending"""
+        if self.status == 'correct':
+            new_status = STATUS_BY_OFFSET[self.verification_count]
+        elif self.status == 'failed':
+            new_status = FAILED_STATUS
+        else:
+            return None
+        return self.message_text.replace(PENDING_STATUS, f'statut :{new_status}')
+
+
 class CardPredictor:
     """Handles card prediction logic"""
     
-    def __init__(self):
-        self.predictions = {}  # Store predictions for verification
+    def __init__(self, rules: Optional[PredictionRules] = None):
+        self.rules = rules or DEFAULT_RULES  # replaced as a whole on reload
+        self.predictions: Dict[int, PredictionRecord] = {}  # Store predictions for verification
         self.processed_messages = set()  # Avoid duplicate processing
-        self.sent_predictions = {}  # Store sent prediction messages for editing
+        self.sent_predictions: Dict[int, List[Tuple[int, int]]] = {}  # game -> [(chat_id, message_id)] for editing
         self.temporary_messages = {}  # Store temporary messages waiting for final edit
+        self.journal = None  # Optional state journal receiving every prediction change
+        self.archived_stats: Counter = Counter()  # status -> count for runs of game numbers already archived
     
     def extract_game_number(self, message: str) -> Optional[int]:
         """Extract game number from message like #n744 or #N744"""
@@ -56,7 +131,7 @@ class CardPredictor:
     def extract_card_symbols(self, text: str) -> List[str]:
         """Extract card symbols from text"""
         cards = []
-        for symbol in CARD_SYMBOLS:
+        for symbol in self.rules.card_symbols:
             # Count how many times this symbol appears
             count = text.count(symbol)
             # Add the symbol that many times
@@ -70,27 +145,24 @@ class CardPredictor:
     
     def is_temporary_message(self, message: str) -> bool:
         """Check if message contains temporary progress emojis"""
-        temporary_emojis = ['⏰', '▶', '🕐', '➡️']
-        return any(emoji in message for emoji in temporary_emojis)
+        return any(emoji in message for emoji in self.rules.temporary_emojis)
     
     def is_final_message(self, message: str) -> bool:
         """Check if message contains final completion emojis"""
-        final_emojis = ['✅', '🔰']
-        return any(emoji in message for emoji in final_emojis)
+        return any(emoji in message for emoji in self.rules.final_emojis)
     
     def get_card_combination(self, cards: List[str]) -> Optional[str]:
         """Get the combination of 3 different cards"""
         unique_cards = list(set(cards))
         if len(unique_cards) == 3:
             # Sort the cards for consistency
-            combination = ''.join(sorted(unique_cards))
+            combination = sys.intern(''.join(sorted(unique_cards)))
             logger.info(f"Card combination found: {combination} from cards: {unique_cards}")
             
             # Check if this combination matches any valid pattern
-            for valid_combo in VALID_CARD_COMBINATIONS:
-                if set(combination) == set(valid_combo):
-                    logger.info(f"Valid combination matched: {valid_combo}")
-                    return combination
+            if frozenset(combination) in self.rules.valid_combination_sets:
+                logger.info(f"Valid combination matched: {combination}")
+                return combination
             
             # If no exact match, but we have 3 different cards, it should be valid
             # All combinations of 3 different card symbols should be valid
@@ -165,19 +237,15 @@ class CardPredictor:
     def make_prediction(self, game_number: int, combination: str) -> str:
         """Make a prediction for the next game"""
         next_game = game_number + 1
-        prediction_text = PREDICTION_MESSAGE.format(numero=next_game)
         
         # Store the prediction for later verification
-        self.predictions[next_game] = {
-            'combination': combination,
-            'status': 'pending',
-            'predicted_from': game_number,
-            'verification_count': 0,
-            'message_text': prediction_text
-        }
+        record = PredictionRecord(next_game, combination, self.rules.prediction_message)
+        self.predictions[next_game] = record
+        self.sent_predictions.pop(next_game, None)
+        self._record_change({'t': 'predict', 'g': next_game, 'c': combination})
         
         logger.info(f"Made prediction for game {next_game} based on combination {combination} from game {game_number}")
-        return prediction_text
+        return record.message_text
     
     def count_cards_in_first_parentheses(self, message: str) -> int:
         """Count the number of card symbols in first parentheses"""
@@ -188,7 +256,7 @@ class CardPredictor:
             # Count all card symbols in first parentheses
             first_content = matches[0]
             card_count = 0
-            for symbol in CARD_SYMBOLS:
+            for symbol in self.rules.card_symbols:
                 card_count += first_content.count(symbol)
             return card_count
         
@@ -210,7 +278,7 @@ class CardPredictor:
         
         # Check all pending predictions to see if this game matches any verification attempt
         for predicted_game, prediction in self.predictions.items():
-            if prediction['status'] != 'pending':
+            if prediction.status != 'pending':
                 continue
                 
             # Check if this game is within the verification range (predicted_game to predicted_game + 3)
@@ -219,58 +287,102 @@ class CardPredictor:
             
             if 0 <= verification_offset <= 3:
                 # Check if message has success symbols (✅ or 🔰) which indicate completion
-                has_success_symbol = '✅' in message or '🔰' in message
+                has_success_symbol = self.is_final_message(message)
                 card_count = self.count_cards_in_first_parentheses(message)
                 logger.info(f"Game {game_number}: Found {card_count} cards in first parentheses, has success symbol (✅ or 🔰): {has_success_symbol}")
                 logger.info(f"Verification offset: {verification_offset}, within range, checking success symbol...")
                 
                 if has_success_symbol and card_count >= 3:
                     # Found success symbol AND exactly 3 cards in first parentheses - update status based on offset
-                    status_map = {0: '✅0️⃣', 1: '✅1️⃣', 2: '✅2️⃣', 3: '✅3️⃣'}
-                    new_status = status_map[verification_offset]
-                    
-                    # Update the prediction message
-                    updated_message = prediction['message_text'].replace('statut :⏳', f'statut :{new_status}')
-                    
-                    prediction['status'] = 'correct'
-                    prediction['verification_count'] = verification_offset
-                    prediction['final_message'] = updated_message
+                    prediction.status = 'correct'
+                    prediction.verification_count = verification_offset
+                    self._record_change({'t': 'verify', 'g': predicted_game, 's': 'correct', 'o': verification_offset})
+                    updated_message = prediction.final_message
                     
                     logger.info(f"Prediction verified for game {predicted_game} at offset {verification_offset} - found ✅ symbol AND {card_count} cards in first parentheses")
                     return {
                         'type': 'update_message',
                         'predicted_game': predicted_game,
                         'new_message': updated_message,
-                        'original_message': prediction['message_text']
+                        'original_message': prediction.message_text
                     }
                 elif has_success_symbol and card_count < 3:
                     logger.info(f"Game {game_number}: Has success symbol but only {card_count} cards in first parentheses (need 3+) - verification not valid")
                     
                 elif verification_offset == 3:
                     # Reached maximum verification attempts without success
-                    updated_message = prediction['message_text'].replace('statut :⏳', 'statut :❌⭕')
-                    
-                    prediction['status'] = 'failed'
-                    prediction['verification_count'] = 4
-                    prediction['final_message'] = updated_message
+                    prediction.status = 'failed'
+                    prediction.verification_count = 4
+                    self._record_change({'t': 'verify', 'g': predicted_game, 's': 'failed', 'o': 4})
+                    updated_message = prediction.final_message
                     
                     logger.info(f"Prediction failed for game {predicted_game} after 4 attempts")
                     return {
                         'type': 'update_message', 
                         'predicted_game': predicted_game,
                         'new_message': updated_message,
-                        'original_message': prediction['message_text']
+                        'original_message': prediction.message_text
                     }
         
         return None
     
+    def reload_rules(self, rules: PredictionRules) -> None:
+        """Swap in a new rule set; callers run between messages so no message sees two rule sets"""
+        self.rules = rules
+        logger.info(f"Prediction rules reloaded: {len(rules.card_symbols)} symbols, "
+                    f"{len(rules.valid_combinations)} combinations")
+
+    def record_sent(self, game_number: int, messages: List[Tuple[int, int]]) -> None:
+        """Remember sent copies of a prediction for later edits, as each target confirms them"""
+        self.sent_predictions.setdefault(game_number, []).extend(messages)
+        self._record_change({'t': 'sent', 'g': game_number, 'm': [list(message) for message in messages]})
+
+    def archive_predictions(self) -> None:
+        """Forget the previous run of game numbers after the counter restarted, keeping its totals for /stats"""
+        self._archive()
+        self._record_change({'t': 'archive'})
+
+    def _archive(self) -> None:
+        """Move the current predictions into the archived totals"""
+        self.archived_stats.update(prediction.status for prediction in self.predictions.values())
+        self.predictions.clear()
+        self.sent_predictions.clear()
+        self.processed_messages.clear()
+        self.temporary_messages.clear()
+
+    def _record_change(self, change: Dict) -> None:
+        """Persist a state change if a journal is attached"""
+        if self.journal is not None:
+            try:
+                self.journal.append(change)
+            except OSError as e:
+                logger.error(f"Failed to write state journal: {e}")
+
+    def apply_change(self, change: Dict) -> None:
+        """Replay a journaled change written by this or another process"""
+        if change['t'] == 'archive':
+            self._archive()
+            return
+        game_number = change['g']
+        if change['t'] == 'predict':
+            self.predictions[game_number] = PredictionRecord(game_number, sys.intern(change['c']), self.rules.prediction_message)
+            self.sent_predictions.pop(game_number, None)
+        elif change['t'] == 'verify':
+            prediction = self.predictions.get(game_number)
+            if prediction is not None:
+                prediction.status = change['s']
+                prediction.verification_count = change['o']
+        elif change['t'] == 'sent':
+            self.sent_predictions.setdefault(game_number, []).extend(tuple(message) for message in change['m'])
+    
     def get_prediction_stats(self) -> Dict:
         """Get statistics about predictions"""
-        total = len(self.predictions)
-        correct = sum(1 for p in self.predictions.values() if p['status'] == 'correct')
-        incorrect = sum(1 for p in self.predictions.values() if p['status'] == 'incorrect')
-        failed = sum(1 for p in self.predictions.values() if p['status'] == 'failed')
-        pending = sum(1 for p in self.predictions.values() if p['status'] == 'pending')
+        archived = self.archived_stats
+        total = len(self.predictions) + sum(archived.values())
+        correct = sum(1 for p in self.predictions.values() if p.status == 'correct') + archived['correct']
+        incorrect = sum(1 for p in self.predictions.values() if p.status == 'incorrect') + archived['incorrect']
+        failed = sum(1 for p in self.predictions.values() if p.status == 'failed') + archived['failed']
+        pending = sum(1 for p in self.predictions.values() if p.status == 'pending')
         
         return {
             'total': total,
@@ -0,0 +1,65 @@
+"""
+Burst coalescing of command replies for Joker's Telegram Bot
+Identical commands in the same chat within a short window get a single reply
+"""
+
+import logging
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+from config import COMMAND_COALESCE_SECONDS, STATS_CACHE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Tracked (chat, command) pairs before stale ones are pruned
+PRUNE_THRESHOLD = 1024
+
+
+class CommandCoalescer:
+    """Suppresses repeated command replies per chat and caches rendered texts"""
+
+    def __init__(self, window: float, cache_ttl: float):
+        self.window = window
+        self.cache_ttl = cache_ttl
+        self.last_reply: Dict[Tuple[int, str], float] = {}
+        self.cache: Dict[str, Tuple[float, str]] = {}
+        self.suppressed: Counter = Counter()
+        self.cache_hits = 0
+
+    def should_reply(self, chat_id: int, command: str, now: Optional[float] = None) -> bool:
+        """True for the first command of a burst; later identical ones are counted and dropped"""
+        now = time.monotonic() if now is None else now
+        key = (chat_id, command)
+        last = self.last_reply.get(key)
+        if last is not None and now - last < self.window:
+            self.suppressed[command] += 1
+            return False
+
+        self.last_reply[key] = now
+        if len(self.last_reply) > PRUNE_THRESHOLD:
+            self.last_reply = {k: t for k, t in self.last_reply.items() if now - t < self.window}
+        return True
+
+    def cached(self, name: str, render: Callable[[], str], now: Optional[float] = None) -> str:
+        """Rendered text for name, re-rendered at most once per cache TTL"""
+        now = time.monotonic() if now is None else now
+        entry = self.cache.get(name)
+        if entry is not None and now - entry[0] < self.cache_ttl:
+            self.cache_hits += 1
+            return entry[1]
+        text = render()
+        self.cache[name] = (now, text)
+        return text
+
+    def snapshot(self) -> Dict:
+        """Suppressed API calls per command and cache hits"""
+        return {
+            'suppressed_replies': dict(self.suppressed),
+            'suppressed_total': sum(self.suppressed.values()),
+            'cache_hits': self.cache_hits,
+        }
+
+
+# Global instance
+command_coalescer = CommandCoalescer(COMMAND_COALESCE_SECONDS, STATS_CACHE_SECONDS)
@@ -2,16 +2,147 @@
 Configuration settings for Joker's Telegram Bot - Deployment Version
 """
 import os
+from typing import FrozenSet, NamedTuple, Optional
 
-# Bot configuration
-BOT_TOKEN = os.getenv('BOT_TOKEN')
+# Optional JSON file with settings (keys are the lower-case field names of Settings)
+CONFIG_FILE_ENV = 'JOKER_CONFIG_FILE'
 
-# Validate bot token
-if not BOT_TOKEN:
-    raise ValueError("BOT_TOKEN environment variable is not set. Please provide a valid Telegram bot token.")
 
-# Port configuration for deployment
-PORT = int(os.getenv('PORT', 10000))
+class Settings(NamedTuple):
+    """Deployment settings, loaded from a JSON file and/or environment variables"""
+
+    bot_token: Optional[str] = None
+    # Port configuration for deployment
+    port: int = 10000
+    # Admin users allowed to run operator commands (comma-separated Telegram user IDs)
+    admin_user_ids: FrozenSet[int] = frozenset()
+    # Load shedding: above these thresholds private replies, static commands
+    # and verbose logging are dropped so game messages keep flowing
+    shed_backlog_threshold: int = 50
+    shed_lag_seconds: float = 0.5
+    # Prediction routing: "source:target1,target2;source2:target3" (chat IDs).
+    # Chats without a route get their predictions back in the same chat.
+    prediction_routes: str = ''
+    max_concurrent_sends: int = 8
+    send_timeout_seconds: float = 10.0
+    # Event-loop watchdog
+    lag_warning_seconds: float = 0.25
+    ready_max_lag_seconds: float = 1.0
+    # Reorder buffer: how long an early game message waits for the games before it
+    reorder_max_wait_seconds: float = 2.0
+    # Binary event log of every parsed game message (empty directory disables it)
+    event_log_dir: str = 'event_log'
+    event_log_segment_mb: int = 64
+    # Journal of prediction state, replayed at startup and tailed by a standby
+    state_journal_path: str = ''
+    # Lock file for active/standby mode: the process holding it polls Telegram
+    leader_lock_path: str = ''
+    # JSON file overriding the card prediction rules below, reloaded on SIGHUP or /reload
+    rules_path: str = ''
+    # Daily per-combination rollups behind /stats (empty path disables them)
+    analytics_path: str = 'daily_stats.bin'
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'Settings':
+        """Load settings from the optional JSON file, then let environment variables override them"""
+        values = {}
+        path = path or os.getenv(CONFIG_FILE_ENV)
+        if path:
+            import json  # only needed when a settings file is used
+            with open(path, encoding='utf-8') as f:
+                values.update(json.load(f))
+
+        for name in cls._fields:
+            raw = os.getenv(name.upper())
+            if raw is not None:
+                values[name] = raw
+
+        unknown = set(values) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown settings in {path}: {', '.join(sorted(unknown))}")
+        return cls(**{name: _convert(name, value) for name, value in values.items()})
+
+    def require_bot_token(self) -> str:
+        """Return the bot token, failing only when something actually needs it"""
+        if not self.bot_token:
+            raise ValueError("BOT_TOKEN environment variable is not set. Please provide a valid Telegram bot token.")
+        return self.bot_token
+
+
+def _convert(name: str, value):
+    """Coerce a file or environment value to the type of the setting"""
+    if name == 'admin_user_ids':
+        if isinstance(value, str):
+            value = value.split(',')
+        return frozenset(int(user_id) for user_id in value if str(user_id).strip())
+    setting_type = Settings.__annotations__[name]
+    if setting_type in (int, float):
+        return setting_type(value)
+    return value
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Settings of this process, loaded on first use"""
+    global _settings
+    if _settings is None:
+        _settings = Settings.load()
+    return _settings
+
+
+# Module attributes resolved lazily from the settings, so importing config
+# never needs a token or reads the environment
+_LAZY_SETTINGS = {
+    'PORT': 'port',
+    'ADMIN_USER_IDS': 'admin_user_ids',
+    'SHED_BACKLOG_THRESHOLD': 'shed_backlog_threshold',
+    'SHED_LAG_SECONDS': 'shed_lag_seconds',
+    'PREDICTION_ROUTES': 'prediction_routes',
+    'MAX_CONCURRENT_SENDS': 'max_concurrent_sends',
+    'SEND_TIMEOUT_SECONDS': 'send_timeout_seconds',
+    'LAG_WARNING_SECONDS': 'lag_warning_seconds',
+    'READY_MAX_LAG_SECONDS': 'ready_max_lag_seconds',
+    'REORDER_MAX_WAIT_SECONDS': 'reorder_max_wait_seconds',
+    'EVENT_LOG_DIR': 'event_log_dir',
+    'STATE_JOURNAL_PATH': 'state_journal_path',
+    'LEADER_LOCK_PATH': 'leader_lock_path',
+    'RULES_PATH': 'rules_path',
+    'ANALYTICS_PATH': 'analytics_path',
+}
+
+
+def __getattr__(name: str):
+    if name == 'BOT_TOKEN':
+        return get_settings().require_bot_token()
+    if name == 'EVENT_LOG_SEGMENT_BYTES':
+        return get_settings().event_log_segment_mb * 1024 * 1024
+    if name in _LAZY_SETTINGS:
+        return getattr(get_settings(), _LAZY_SETTINGS[name])
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
+
+
+# Identical commands in a chat within this window get a single reply,
+# and the rendered /stats text is reused for this long
+COMMAND_COALESCE_SECONDS = 5.0
+STATS_CACHE_SECONDS = 3.0
+
+# Daily analytics: how often rollups are written to disk, and the /stats period
+ANALYTICS_SAVE_SECONDS = 10.0
+STATS_DEFAULT_DAYS = 7
+STATS_MAX_DAYS = 365
+
+# Standby: how often to retry the leader lock and tail the state journal
+STANDBY_POLL_SECONDS = 0.2
+
+# Profiling
+PROFILE_DEFAULT_SECONDS = 5
+PROFILE_MAX_SECONDS = 60
+PROFILE_TOP_N = 15
+
+# Event-loop watchdog
+WATCHDOG_INTERVAL = 0.1  # seconds between lag probes
 
 # Bot messages
 GREETING_MESSAGE = """
@@ -50,7 +181,7 @@ Commandes disponibles :
 • /help - Afficher ce message d'aide
 • /about - En savoir plus sur le bot
 • /dev - Informations sur le développeur
-• /stats - Afficher les statistiques de prédiction
+• /stats [jours] - Afficher les statistiques de prédiction
 • /deploy - Créer un package de déploiement
 
 Fonctionnalités :
@@ -114,6 +245,22 @@ VALID_CARD_COMBINATIONS = [
 # Card symbols for detection
 CARD_SYMBOLS = ["♥️", "♠️", "♦️", "♣️"]
 
+# Progress emojis of a message that will be edited later, and of a completed game
+TEMPORARY_EMOJIS = ['⏰', '▶', '🕐', '➡️']
+FINAL_EMOJIS = ['✅', '🔰']
+
+# Jump in game numbers the reorder buffer treats as a counter restart
+REORDER_RESET_GAP = 100
+
+# Shadow strategies: prediction rule variants evaluated on every game message
+# without sending anything (see shadow.ShadowStrategy for the options)
+SHADOW_STRATEGIES = [
+    {'name': 'deuxième_parenthèse', 'parentheses': 'second'},
+    {'name': 'première_parenthèse', 'parentheses': 'first'},
+    {'name': 'fenêtre_2', 'max_offset': 2},
+    {'name': 'trois_ou_quatre', 'max_distinct': 4},
+]
+
 # Prediction message template
 PREDICTION_MESSAGE = "🔵{numero} 🔵3K: statut :⏳"
 
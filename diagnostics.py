@@ -0,0 +1,258 @@
+"""
+On-demand diagnostics for Joker's Telegram Bot
+Sampling CPU profiler, tracemalloc snapshots and a small local HTTP hook
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Items measured per container before extrapolating its deep size
+SIZE_SAMPLE_LIMIT = 1000
+
+# One memory profile at a time: the call that starts tracemalloc also stops it
+_memory_profile_lock = asyncio.Lock()
+
+
+def _sample_thread_stacks(thread_id: int, seconds: float, interval: float) -> Tuple[Counter, int]:
+    """Sample the stack of one thread, returning collapsed stacks and sample count"""
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            stacks[';'.join(reversed(names))] += 1
+            samples += 1
+        time.sleep(interval)
+    return stacks, samples
+
+
+async def cpu_profile(seconds: float, interval: float = 0.005) -> Tuple[Counter, int]:
+    """Sample the event loop thread for the given duration without blocking it"""
+    loop_thread = threading.get_ident()
+    return await asyncio.to_thread(_sample_thread_stacks, loop_thread, seconds, interval)
+
+
+def format_cpu_report(stacks: Counter, samples: int, top_n: int = 15) -> str:
+    """Format the hottest functions (self and cumulative) from collapsed stacks"""
+    if not samples:
+        return "Aucun échantillon collecté"
+
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_counts[frames[-1]] += count
+        for name in set(frames):
+            total_counts[name] += count
+
+    lines = [f"🔥 Profil CPU - {samples} échantillons", "", "Temps propre :"]
+    for name, count in self_counts.most_common(top_n):
+        lines.append(f"{count / samples * 100:5.1f}% {name}")
+    lines += ["", "Temps cumulé :"]
+    for name, count in total_counts.most_common(top_n):
+        lines.append(f"{count / samples * 100:5.1f}% {name}")
+    return '\n'.join(lines)
+
+
+def format_collapsed_stacks(stacks: Counter) -> str:
+    """Format stacks in the collapsed format used by flamegraph.pl and speedscope"""
+    return '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+async def memory_profile(seconds: float, top_n: int = 15) -> str:
+    """Trace allocations for the given duration and report the top allocation sites"""
+    async with _memory_profile_lock:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            await asyncio.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+    lines = [
+        f"🧠 Profil mémoire - {seconds:g}s",
+        f"Mémoire tracée: {current / 1024:.1f} KB (pic {peak / 1024:.1f} KB)",
+        "",
+        "Croissance pendant la fenêtre :",
+    ]
+    for stat in after.compare_to(before, 'lineno')[:top_n]:
+        lines.append(f"{stat.size_diff / 1024:+8.1f} KB {stat.traceback}")
+    lines += ["", "Plus gros sites d'allocation :"]
+    for stat in after.statistics('lineno')[:top_n]:
+        lines.append(f"{stat.size / 1024:8.1f} KB {stat.traceback}")
+    return '\n'.join(lines)
+
+
+def _shallow_item_size(item) -> int:
+    """Size of one container item, including the parts of tuples and lists"""
+    if isinstance(item, (tuple, list)):
+        return sys.getsizeof(item) + sum(_shallow_item_size(part) for part in item)
+    return sys.getsizeof(item)
+
+
+def estimate_container_size(container) -> int:
+    """Estimate the deep size of a dict or set, sampling large containers"""
+    size = sys.getsizeof(container)
+    if not container:
+        return size
+
+    items = container.items() if isinstance(container, dict) else container
+    sampled = 0
+    sampled_size = 0
+    for item in items:
+        if isinstance(container, dict):
+            key, value = item
+            sampled_size += sys.getsizeof(key) + _shallow_item_size(value)
+        else:
+            sampled_size += _shallow_item_size(item)
+        sampled += 1
+        if sampled >= SIZE_SAMPLE_LIMIT:
+            break
+    return size + sampled_size * len(container) // sampled
+
+
+def container_sizes(predictor) -> Dict[str, Tuple[int, int]]:
+    """Return (entries, estimated bytes) for each card predictor container"""
+    sizes = {}
+    for name in ('predictions', 'sent_predictions', 'processed_messages', 'temporary_messages'):
+        container = getattr(predictor, name, None)
+        if container is not None:
+            sizes[name] = (len(container), estimate_container_size(container))
+    return sizes
+
+
+def format_container_sizes(predictor) -> str:
+    """Format per-structure sizes of the card predictor"""
+    lines = ["📦 Structures du prédicteur :"]
+    for name, (entries, size) in container_sizes(predictor).items():
+        lines.append(f"• {name}: {entries} entrées, ~{size / 1024:.1f} KB")
+    return '\n'.join(lines)
+
+
+Route = Callable[[Dict[str, List[str]]], Awaitable[Tuple[int, str, str]]]
+
+
+class DiagnosticsServer:
+    """Minimal asyncio HTTP server for operator hooks"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Tuple[Route, bool]] = {}
+        self.metrics: Dict[str, Callable[[], Dict]] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.add_route('/metrics', self._metrics_route)
+
+    def add_route(self, path: str, handler: Route, local_only: bool = False) -> None:
+        """Register a GET handler returning (status, content_type, body)"""
+        self.routes[path] = (handler, local_only)
+
+    def register_metrics(self, name: str, provider: Callable[[], Dict]) -> None:
+        """Expose a component's counters under /metrics"""
+        self.metrics[name] = provider
+
+    async def _metrics_route(self, query) -> Tuple[int, str, str]:
+        """Serve every registered component's counters as JSON"""
+        body = {name: provider() for name, provider in self.metrics.items()}
+        return 200, 'application/json', json.dumps(body, ensure_ascii=False)
+
+    async def start(self) -> None:
+        """Start listening"""
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"Diagnostics server listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Stop listening"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve a single HTTP request"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain headers, the hooks only take query parameters
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2 or parts[0] != 'GET':
+                status, content_type, body = 405, 'text/plain', 'method not allowed'
+            else:
+                url = urlsplit(parts[1])
+                route = self.routes.get(url.path)
+                peer = writer.get_extra_info('peername')
+                is_local = bool(peer) and peer[0] in ('127.0.0.1', '::1')
+                if route is None:
+                    status, content_type, body = 404, 'text/plain', 'not found'
+                elif route[1] and not is_local:
+                    status, content_type, body = 403, 'text/plain', 'forbidden'
+                else:
+                    status, content_type, body = await route[0](parse_qs(url.query))
+
+            payload = body.encode('utf-8')
+            writer.write(
+                f"HTTP/1.0 {status} {'OK' if status < 400 else 'ERROR'}\r\n"
+                f"Content-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode('latin-1') + payload
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.error(f"Error in diagnostics request: {e}")
+        finally:
+            writer.close()
+
+
+def _query_number(query: Dict[str, List[str]], name: str, default: float, maximum: float) -> float:
+    """Read a bounded numeric query parameter"""
+    try:
+        value = float(query.get(name, [default])[0])
+    except ValueError:
+        value = default
+    return max(0.0, min(value, maximum))
+
+
+def add_profiling_routes(server: DiagnosticsServer, predictor, max_seconds: float) -> None:
+    """Register the loopback-only profiling hooks"""
+
+    async def cpu_route(query):
+        seconds = _query_number(query, 'seconds', 5, max_seconds)
+        top_n = int(_query_number(query, 'top', 15, 100))
+        stacks, samples = await cpu_profile(seconds)
+        if query.get('format', [''])[0] == 'collapsed':
+            return 200, 'text/plain', format_collapsed_stacks(stacks)
+        return 200, 'text/plain', format_cpu_report(stacks, samples, top_n) + '\n\n' + format_container_sizes(predictor)
+
+    async def memory_route(query):
+        seconds = _query_number(query, 'seconds', 5, max_seconds)
+        top_n = int(_query_number(query, 'top', 15, 100))
+        report = await memory_profile(seconds, top_n)
+        return 200, 'text/plain', report + '\n\n' + format_container_sizes(predictor)
+
+    server.add_route('/debug/profile/cpu', cpu_route, local_only=True)
+    server.add_route('/debug/profile/memory', memory_route, local_only=True)
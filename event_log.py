@@ -0,0 +1,249 @@
+"""
+Append-only binary event log of parsed game messages
+Fixed-size records in size-rotated segments, with a sparse game-number index and mmap reads
+"""
+
+import glob
+import logging
+import mmap
+import os
+import struct
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import CARD_SYMBOLS
+
+if TYPE_CHECKING:
+    # Only for annotations, so the reader works without the bot configuration
+    from card_predictor import ParsedGameMessage
+
+logger = logging.getLogger(__name__)
+
+# chat_id, message_id, timestamp, game_number, flags, suit counts of the first two parentheses
+RECORD = struct.Struct('<qqdIB8B')
+# Suit of each count column, fixed whatever the symbol order of the active rules
+LOG_SUITS = tuple(CARD_SYMBOLS[:4])
+# first record, end record, min game number, max game number of one index block
+INDEX_ENTRY = struct.Struct('<QQII')
+
+FLAG_EDIT = 1
+FLAG_TEMPORARY = 2
+FLAG_FINAL = 4
+
+SEGMENT_PATTERN = 'events-{:06d}.log'
+
+
+class GameEvent(NamedTuple):
+    """One logged game message"""
+    chat_id: int
+    message_id: int
+    timestamp: float
+    game_number: int
+    flags: int
+    first_counts: Tuple[int, int, int, int]
+    second_counts: Tuple[int, int, int, int]
+
+    @property
+    def is_edit(self) -> bool:
+        return bool(self.flags & FLAG_EDIT)
+
+    @property
+    def is_temporary(self) -> bool:
+        return bool(self.flags & FLAG_TEMPORARY)
+
+    @property
+    def is_final(self) -> bool:
+        return bool(self.flags & FLAG_FINAL)
+
+
+@lru_cache(maxsize=8)
+def _columns(card_symbols: Tuple[str, ...]) -> Tuple[Optional[int], ...]:
+    """Position of each LOG_SUITS symbol among the parsed suit counts (None if the rules lack it)"""
+    return tuple(card_symbols.index(suit) if suit in card_symbols else None for suit in LOG_SUITS)
+
+
+def _counts(parsed: 'ParsedGameMessage', index: int) -> Tuple[int, ...]:
+    """Suit counts of one parentheses group in LOG_SUITS order, clamped to a byte"""
+    if index >= len(parsed.suit_counts):
+        return (0,) * len(LOG_SUITS)
+    counts = parsed.suit_counts[index]
+    return tuple(0 if column is None else min(counts[column], 255) for column in _columns(parsed.card_symbols))
+
+
+class EventLogWriter:
+    """Appends records to the current segment and maintains its sparse index"""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 index_every: int = 256, flush_interval: float = 1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes - segment_bytes % RECORD.size
+        self.index_every = index_every
+        self.flush_interval = flush_interval
+        self.file = None
+        self.last_flush = 0.0
+
+    def _open(self) -> None:
+        """Open the newest segment on first use"""
+        os.makedirs(self.directory, exist_ok=True)
+        segments = list_segments(self.directory)
+        self.segment_number = int(os.path.basename(segments[-1])[7:13]) if segments else 1
+        self._open_segment()
+
+    def _open_segment(self) -> None:
+        """Open the current segment for appending and load its block bounds"""
+        path = os.path.join(self.directory, SEGMENT_PATTERN.format(self.segment_number))
+        self.file = open(path, 'ab')
+        # Drop a torn trailing record left by a crash
+        size = self.file.tell()
+        if size % RECORD.size:
+            self.file.truncate(size - size % RECORD.size)
+            self.file.seek(0, os.SEEK_END)
+        self.records = self.file.tell() // RECORD.size
+        self.index_file = open(path + '.idx', 'ab')
+        # Block of the current (possibly partial) run of records not yet indexed
+        self.block_start = self.records - self.records % self.index_every
+        self.block_min, self.block_max = _scan_bounds(path, self.block_start, self.records)
+
+    def append(self, chat_id: int, message_id: int, parsed: 'ParsedGameMessage',
+               is_edit: bool = False, timestamp: Optional[float] = None) -> None:
+        """Append one parsed game message"""
+        if self.file is None:
+            self._open()
+        flags = (FLAG_EDIT if is_edit else 0) | (FLAG_TEMPORARY if parsed.is_temporary else 0) | (FLAG_FINAL if parsed.is_final else 0)
+        self.file.write(RECORD.pack(
+            chat_id, message_id, time.time() if timestamp is None else timestamp,
+            parsed.game_number & 0xFFFFFFFF, flags, *_counts(parsed, 0), *_counts(parsed, 1)
+        ))
+        self.records += 1
+        game = parsed.game_number & 0xFFFFFFFF
+        self.block_min = game if self.block_min is None else min(self.block_min, game)
+        self.block_max = game if self.block_max is None else max(self.block_max, game)
+
+        if self.records - self.block_start >= self.index_every:
+            self._write_index_entry()
+        if self.records * RECORD.size >= self.segment_bytes:
+            self.rotate()
+        elif time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _write_index_entry(self) -> None:
+        """Close the current block in the sparse index"""
+        if self.block_min is not None:
+            self.index_file.write(INDEX_ENTRY.pack(self.block_start, self.records, self.block_min, self.block_max))
+        self.block_start = self.records
+        self.block_min = self.block_max = None
+
+    def flush(self) -> None:
+        """Push buffered records to the OS"""
+        if self.file is not None:
+            self.file.flush()
+            self.index_file.flush()
+        self.last_flush = time.monotonic()
+
+    def rotate(self) -> None:
+        """Seal the current segment and start the next one"""
+        self._write_index_entry()
+        self.close()
+        self.segment_number += 1
+        self._open_segment()
+        logger.info(f"Event log rotated to segment {self.segment_number}")
+
+    def close(self) -> None:
+        """Flush and close the current segment"""
+        if self.file is None:
+            return
+        self.flush()
+        self.file.close()
+        self.index_file.close()
+        self.file = None
+
+
+def list_segments(directory: str) -> List[str]:
+    """Segment paths in append order"""
+    return sorted(glob.glob(os.path.join(directory, 'events-*.log')))
+
+
+def _scan_bounds(path: str, start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+    """Min and max game numbers of records [start, end) in a segment"""
+    if end <= start:
+        return None, None
+    games = [record[3] for record in _iter_records(path, start, end)]
+    return min(games), max(games)
+
+
+def _iter_records(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[tuple]:
+    """Unpack raw records from a segment through mmap without copying the file"""
+    size = os.path.getsize(path)
+    count = size // RECORD.size
+    end = count if end is None else min(end, count)
+    if end <= start:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            yield from RECORD.iter_unpack(view[start * RECORD.size:end * RECORD.size])
+        finally:
+            view.release()
+
+
+def _to_event(record: tuple) -> GameEvent:
+    return GameEvent(record[0], record[1], record[2], record[3], record[4], record[5:9], record[9:13])
+
+
+class EventLogReader:
+    """Scans and range-queries the event log across segments"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def scan(self) -> Iterator[GameEvent]:
+        """Every logged event in append order"""
+        for path in list_segments(self.directory):
+            for record in _iter_records(path):
+                yield _to_event(record)
+
+    def range(self, first_game: int, last_game: int) -> Iterator[GameEvent]:
+        """Events whose game number is in [first_game, last_game], using the sparse index to skip blocks"""
+        for path in list_segments(self.directory):
+            count = os.path.getsize(path) // RECORD.size
+            covered = 0
+            for block_start, block_end, block_min, block_max in self._blocks(path):
+                # Records missing from the index (e.g. after a crash) are scanned directly
+                yield from self._scan_range(path, covered, block_start, first_game, last_game)
+                covered = max(covered, block_end)
+                if block_max < first_game or block_min > last_game:
+                    continue
+                yield from self._scan_range(path, block_start, block_end, first_game, last_game)
+            yield from self._scan_range(path, covered, count, first_game, last_game)
+
+    @staticmethod
+    def _scan_range(path: str, start: int, end: int, first_game: int, last_game: int) -> Iterator[GameEvent]:
+        """Matching events among records [start, end) of a segment"""
+        for record in _iter_records(path, start, end):
+            if first_game <= record[3] <= last_game:
+                yield _to_event(record)
+
+    @staticmethod
+    def _blocks(path: str) -> List[Tuple[int, int, int, int]]:
+        """(start, end, min, max) of each indexed block of a segment"""
+        index_path = path + '.idx'
+        if not os.path.exists(index_path):
+            return []
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        return list(INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % INDEX_ENTRY.size]))
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python event_log.py <directory> [first_game last_game]
+    reader = EventLogReader(sys.argv[1])
+    events = reader.range(int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else reader.scan()
+    for event in events:
+        print(
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event.timestamp))} chat={event.chat_id} "
+            f"msg={event.message_id} #n{event.game_number} first={event.first_counts} second={event.second_counts} "
+            f"{'edit ' if event.is_edit else ''}{'temporary ' if event.is_temporary else ''}{'final' if event.is_final else ''}"
+        )
@@ -0,0 +1,131 @@
+"""
+Prediction fan-out for Joker's Telegram Bot
+Routes predictions from a source chat to its target channels with bounded concurrency
+"""
+
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from config import PREDICTION_ROUTES, MAX_CONCURRENT_SENDS, SEND_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionFanout:
+    """Sends and edits prediction copies across target channels concurrently"""
+
+    def __init__(self, routes: Dict[int, List[int]], max_concurrent: int = 8, timeout: float = 10.0):
+        self.routes = routes
+        self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.tasks: Set[asyncio.Task] = set()
+        self.in_flight: Dict[int, List[asyncio.Task]] = {}  # prediction key -> its pending sends
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding in-flight API calls, created on the running loop"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def targets_for(self, source_chat_id: int) -> List[int]:
+        """Destination chats for a source chat; unrouted chats get predictions back"""
+        return self.routes.get(source_chat_id, [source_chat_id])
+
+    async def _send_one(self, bot, chat_id: int, text: str) -> Optional[Tuple[int, int]]:
+        """Send to one target, giving up after the timeout so others are not held back"""
+        try:
+            async with self.semaphore:
+                sent_message = await asyncio.wait_for(
+                    bot.send_message(chat_id=chat_id, text=text), timeout=self.timeout
+                )
+            return sent_message.chat_id, sent_message.message_id
+        except Exception as e:
+            logger.error(f"Failed to send prediction to chat {chat_id}: {e!r}")
+            return None
+
+    async def _edit_one(self, bot, chat_id: int, message_id: int, text: str) -> None:
+        """Edit one copy, falling back to a new message in that chat if editing fails"""
+        try:
+            async with self.semaphore:
+                await asyncio.wait_for(
+                    bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text),
+                    timeout=self.timeout
+                )
+        except Exception as e:
+            logger.error(f"Failed to edit message {message_id} in chat {chat_id}: {e!r}")
+            await self._send_one(bot, chat_id, text)
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        """Run a delivery in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _deliver(self, bot, chat_id: int, text: str,
+                       on_sent: Callable[[List[Tuple[int, int]]], None]) -> None:
+        """Send one copy and report it as soon as it lands"""
+        sent = await self._send_one(bot, chat_id, text)
+        if sent is not None:
+            on_sent([sent])
+
+    def send(self, bot, key: int, source_chat_id: int, text: str,
+             on_sent: Callable[[List[Tuple[int, int]]], None]) -> None:
+        """Start sending a prediction to every target of the source chat without waiting for them
+
+        Each (chat_id, message_id) copy is passed to on_sent when its target answers, so a slow
+        channel neither holds back the update pipeline nor the other channels.
+        """
+        tasks = [self._spawn(self._deliver(bot, chat_id, text, on_sent)) for chat_id in self.targets_for(source_chat_id)]
+        self.in_flight[key] = tasks
+        # Forget the sends once all of them are done, unless a newer prediction reused the key
+        remaining = len(tasks)
+
+        def finished(task: asyncio.Task) -> None:
+            nonlocal remaining
+            remaining -= 1
+            if not remaining and self.in_flight.get(key) is tasks:
+                del self.in_flight[key]
+
+        for task in tasks:
+            task.add_done_callback(finished)
+
+    def edit(self, bot, key: int, messages: Callable[[], List[Tuple[int, int]]], text: str) -> None:
+        """Start editing every copy of a prediction once its sends have finished"""
+        self._spawn(self._edit_after_sends(bot, key, messages, text))
+
+    async def _edit_after_sends(self, bot, key: int, messages: Callable[[], List[Tuple[int, int]]], text: str) -> None:
+        """Wait for copies still being sent, then edit all of them"""
+        pending = self.in_flight.get(key)
+        if pending:
+            await asyncio.wait(pending)
+        copies = messages()
+        if not copies:
+            logger.warning(f"No sent message to update for prediction {key}")
+            return
+        await asyncio.gather(
+            *(self._edit_one(bot, chat_id, message_id, text) for chat_id, message_id in copies)
+        )
+
+    async def drain(self) -> None:
+        """Wait for deliveries still in progress (at most one timeout, plus a fallback send)"""
+        if self.tasks:
+            await asyncio.wait(list(self.tasks))
+
+
+def parse_routes(spec: str) -> Dict[int, List[int]]:
+    """Parse routes like "-100111:-100222,-100333;-100444:-100555" into {source: [targets]}"""
+    routes: Dict[int, List[int]] = {}
+    for entry in spec.split(';'):
+        if not entry.strip():
+            continue
+        source, _, targets = entry.partition(':')
+        routes[int(source)] = [int(target) for target in targets.split(',') if target.strip()]
+    return routes
+
+
+# Global instance
+prediction_fanout = PredictionFanout(parse_routes(PREDICTION_ROUTES), MAX_CONCURRENT_SENDS, SEND_TIMEOUT_SECONDS)
@@ -2,6 +2,7 @@
 Event handlers for the Telegram bot
 """
 
+import io
 import logging
 from datetime import datetime, timedelta
 from collections import defaultdict
@@ -10,9 +11,18 @@ from telegram.ext import ContextTypes
 from telegram.constants import ChatType
 from config import (
     GREETING_MESSAGE, WELCOME_MESSAGE, HELP_MESSAGE, 
-    ABOUT_MESSAGE, DEV_MESSAGE, MAX_MESSAGES_PER_MINUTE, RATE_LIMIT_WINDOW
+    ABOUT_MESSAGE, DEV_MESSAGE, MAX_MESSAGES_PER_MINUTE, RATE_LIMIT_WINDOW,
+    ADMIN_USER_IDS, PROFILE_DEFAULT_SECONDS, PROFILE_MAX_SECONDS, PROFILE_TOP_N,
+    STATS_DEFAULT_DAYS, STATS_MAX_DAYS
 )
+from analytics_store import OUTCOMES, FAILED
 from card_predictor import card_predictor
+from fanout import prediction_fanout
+from prediction_engine import prediction_engine, MessageEvent, SendPrediction, EditStatus
+from shadow import shadow_runner
+from load_shedding import load_shedder
+from command_coalescer import command_coalescer
+import diagnostics
 
 logger = logging.getLogger(__name__)
 
@@ -65,12 +75,20 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         user = update.effective_user
         chat = update.effective_chat
 
+        # Static replies are the first work dropped under load
+        if load_shedder.should_shed('static_command'):
+            return
+
         # Rate limiting check
         if user and is_rate_limited(user.id):
             if update.message:
                 await update.message.reply_text("⏰ Veuillez patienter avant d'envoyer une autre commande.")
             return
 
+        # One reply per burst of identical commands in a chat (rate-limited senders never start one)
+        if update.effective_chat and not command_coalescer.should_reply(update.effective_chat.id, 'start'):
+            return
+
         if user and chat:
             logger.info(f"Start command from user {user.id} in chat {chat.id}")
 
@@ -87,12 +105,20 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     try:
         user = update.effective_user
 
+        # Static replies are the first work dropped under load
+        if load_shedder.should_shed('static_command'):
+            return
+
         # Rate limiting check
         if user and is_rate_limited(user.id):
             if update.message:
                 await update.message.reply_text("⏰ Veuillez patienter avant d'envoyer une autre commande.")
             return
 
+        # One reply per burst of identical commands in a chat (rate-limited senders never start one)
+        if update.effective_chat and not command_coalescer.should_reply(update.effective_chat.id, 'help'):
+            return
+
         if user:
             logger.info(f"Help command from user {user.id}")
 
@@ -109,12 +135,20 @@ async def about_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     try:
         user = update.effective_user
 
+        # Static replies are the first work dropped under load
+        if load_shedder.should_shed('static_command'):
+            return
+
         # Rate limiting check
         if user and is_rate_limited(user.id):
             if update.message:
                 await update.message.reply_text("⏰ Veuillez patienter avant d'envoyer une autre commande.")
             return
 
+        # One reply per burst of identical commands in a chat (rate-limited senders never start one)
+        if update.effective_chat and not command_coalescer.should_reply(update.effective_chat.id, 'about'):
+            return
+
         if user:
             logger.info(f"About command from user {user.id}")
 
@@ -131,12 +165,20 @@ async def dev_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     try:
         user = update.effective_user
 
+        # Static replies are the first work dropped under load
+        if load_shedder.should_shed('static_command'):
+            return
+
         # Rate limiting check
         if user and is_rate_limited(user.id):
             if update.message:
                 await update.message.reply_text("⏰ Veuillez patienter avant d'envoyer une autre commande.")
             return
 
+        # One reply per burst of identical commands in a chat (rate-limited senders never start one)
+        if update.effective_chat and not command_coalescer.should_reply(update.effective_chat.id, 'dev'):
+            return
+
         if user:
             logger.info(f"Dev command from user {user.id}")
 
@@ -169,6 +211,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
         # Only respond in private chats for regular messages
         if chat and message and chat.type == ChatType.PRIVATE:
+            if load_shedder.should_shed('private_reply'):
+                return
             await message.reply_text(
                 "🎭 Salut ! Je suis le bot de Joker.\n"
                 "Utilisez /help pour voir mes commandes disponibles.\n\n"
@@ -196,117 +240,99 @@ async def handle_edited_message(update: Update, context: ContextTypes.DEFAULT_TY
             # Check for card prediction and verification in group/channel messages
             if chat.type in [ChatType.GROUP, ChatType.SUPERGROUP, ChatType.CHANNEL]:
                 # Process for both prediction and verification
-                await process_card_message_for_verification(update, context, message.text)
+                await process_card_message(update, context, message.text, is_edit=True)
 
     except Exception as e:
         logger.error(f"Error in handle_edited_message: {e}")
 
-async def process_card_message(update: Update, context: ContextTypes.DEFAULT_TYPE, message_text: str) -> None:
-    """Process message for card predictions"""
+def dispatch_actions(bot, actions) -> None:
+    """Start carrying out prediction engine actions through the Telegram API
+
+    Deliveries run in the background so the next game message is never held back by a slow
+    channel; the fan-out edits a prediction only after its own sends have finished.
+    """
+    for action in actions:
+        if isinstance(action, SendPrediction):
+            logger.info(f"Making prediction: {action.text}")
+            game = action.predicted_game
+            prediction_fanout.send(bot, game, action.source_chat_id, action.text,
+                                   lambda sent, game=game: prediction_engine.record_sent(game, sent))
+
+        elif isinstance(action, EditStatus):
+            # Edit the original prediction messages instead of sending new ones
+            logger.info(f"Verification for game {action.predicted_game}: {action.text}")
+            game = action.predicted_game
+            prediction_fanout.edit(bot, game, lambda game=game: prediction_engine.sent_messages(game), action.text)
+
+async def process_card_message(update: Update, context: ContextTypes.DEFAULT_TYPE, message_text: str, is_edit: bool = False) -> None:
+    """Feed a game message to the prediction engine and dispatch its actions"""
     try:
-        # Check if we should make a prediction
-        should_predict, game_number, combination = card_predictor.should_predict(message_text)
-
-        if should_predict and game_number is not None and combination is not None:
-            prediction = card_predictor.make_prediction(game_number, combination)
-            next_game = game_number + 1  # The game we're predicting for
-            logger.info(f"Making prediction: {prediction}")
-
-            # Send prediction to the chat
-            if update.effective_chat:
-                sent_message = await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=prediction
-                )
-                # Store the message information for potential later edits
-                card_predictor.sent_predictions[next_game] = {
-                    'chat_id': sent_message.chat_id,
-                    'message_id': sent_message.message_id
-                }
-                logger.info(f"Stored prediction message for game {next_game}")
-
-        # Check if this message verifies a previous prediction
-        verification_result = card_predictor.verify_prediction(message_text)
-        if verification_result and update.effective_chat:
-            logger.info(f"Verification result: {verification_result}")
-
-            if verification_result['type'] == 'update_message':
-                # Edit the original prediction message instead of sending a new one
-                predicted_game = verification_result['predicted_game']
-                if predicted_game in card_predictor.sent_predictions:
-                    message_info = card_predictor.sent_predictions[predicted_game]
-                    try:
-                        await context.bot.edit_message_text(
-                            chat_id=message_info['chat_id'],
-                            message_id=message_info['message_id'],
-                            text=verification_result['new_message']
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to edit message: {e}")
-                        # Fallback: send new message if editing fails
-                        await context.bot.send_message(
-                            chat_id=update.effective_chat.id,
-                            text=verification_result['new_message']
-                        )
+        message = update.effective_message
+        if not update.effective_chat or not message:
+            return
+
+        event = MessageEvent(update.effective_chat.id, message.message_id, message_text, is_edit)
+        dispatch_actions(context.bot, prediction_engine.handle(event))
 
     except Exception as e:
         logger.error(f"Error in process_card_message: {e}")
 
-async def process_card_message_for_verification(update: Update, context: ContextTypes.DEFAULT_TYPE, message_text: str) -> None:
-    """Process message specifically for verification and final predictions (used for edited messages)"""
+async def flush_reordered_messages(bot) -> None:
+    """Process game messages whose wait for missing earlier games expired"""
     try:
-        # Check if this is a final message that should trigger a prediction
-        should_predict, game_number, combination = card_predictor.should_predict(message_text)
-        
-        if should_predict and game_number is not None and combination is not None:
-            prediction = card_predictor.make_prediction(game_number, combination)
-            next_game = game_number + 1  # The game we're predicting for
-            logger.info(f"Making prediction from edited message: {prediction}")
-
-            # Send prediction to the chat
-            if update.effective_chat:
-                sent_message = await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=prediction
-                )
-                # Store the message information for potential later edits
-                card_predictor.sent_predictions[next_game] = {
-                    'chat_id': sent_message.chat_id,
-                    'message_id': sent_message.message_id
-                }
-                logger.info(f"Stored prediction message for game {next_game} from edited message")
-        
-        # Check for verification
-        verification_result = card_predictor.verify_prediction(message_text)
-        if verification_result and update.effective_chat:
-            logger.info(f"Verification result from edited message: {verification_result}")
-
-            if verification_result['type'] == 'update_message':
-                # Edit the original prediction message instead of sending a new one
-                predicted_game = verification_result['predicted_game']
-                if predicted_game in card_predictor.sent_predictions:
-                    message_info = card_predictor.sent_predictions[predicted_game]
-                    try:
-                        await context.bot.edit_message_text(
-                            chat_id=message_info['chat_id'],
-                            message_id=message_info['message_id'],
-                            text=verification_result['new_message']
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to edit message: {e}")
-                        # Fallback: send new message if editing fails
-                        await context.bot.send_message(
-                            chat_id=update.effective_chat.id,
-                            text=verification_result['new_message']
-                        )
-
+        dispatch_actions(bot, prediction_engine.flush_expired())
     except Exception as e:
-        logger.error(f"Error in process_card_message_for_verification: {e}")
+        logger.error(f"Error in flush_reordered_messages: {e}")
+
+def parse_stats_days(args) -> int:
+    """Period of the /stats breakdown in days, from the optional first argument"""
+    if not args:
+        return STATS_DEFAULT_DAYS
+    try:
+        days = int(args[0])
+    except ValueError:
+        return STATS_DEFAULT_DAYS
+    return max(1, min(days, STATS_MAX_DAYS))
+
+def render_combination_breakdown(days: int) -> str:
+    """Per-combination results over the last days, read from the daily rollups"""
+    analytics = prediction_engine.analytics
+    if analytics is None:
+        return ""
+    breakdown = analytics.last_days(days)
+    if not breakdown:
+        return f"\n📅 **{days} derniers jours par combinaison**\nAucune prédiction vérifiée.\n"
+
+    lines = [f"\n📅 **{days} derniers jours par combinaison**"]
+    for combination, counts in sorted(breakdown.items(), key=lambda item: -sum(item[1])):
+        total = sum(counts)
+        hits = total - counts[FAILED]
+        detail = ' '.join(f"{label}×{count}" for label, count in zip(OUTCOMES, counts) if count)
+        lines.append(f"{combination}: {hits}/{total} ({hits / total * 100:.0f}%) — {detail}")
+    return '\n'.join(lines) + '\n'
+
+def render_stats_message(days: int = STATS_DEFAULT_DAYS) -> str:
+    """Build the /stats reply from the current prediction statistics"""
+    stats = card_predictor.get_prediction_stats()
+
+    return f"""
+📊 **Statistiques de Prédiction**
+
+🎯 Total des prédictions: {stats['total']}
+✅ Correctes: {stats['correct']}
+❌ Incorrectes: {stats['incorrect']}
+🚫 Échouées: {stats['failed']}
+⌛ En attente: {stats['pending']}
+📈 Précision: {stats['accuracy']:.1f}%
+{render_combination_breakdown(days)}
+🎭 Bot de Joker - Développé par Kouamé
+        """
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /stats command to show prediction statistics"""
     try:
         user = update.effective_user
+        days = parse_stats_days(context.args)
 
         # Rate limiting check
         if user and is_rate_limited(user.id):
@@ -314,24 +340,15 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
                 await update.message.reply_text("⏰ Veuillez patienter avant d'envoyer une autre commande.")
             return
 
+        # One reply per burst of identical commands in a chat (rate-limited senders never start one)
+        if update.effective_chat and not command_coalescer.should_reply(update.effective_chat.id, f'stats {days}'):
+            return
+
         if user:
             logger.info(f"Stats command from user {user.id}")
 
-        # Get prediction statistics
-        stats = card_predictor.get_prediction_stats()
-
-        stats_message = f"""
-📊 **Statistiques de Prédiction**
-
-🎯 Total des prédictions: {stats['total']}
-✅ Correctes: {stats['correct']}
-❌ Incorrectes: {stats['incorrect']}
-🚫 Échouées: {stats['failed']}
-⌛ En attente: {stats['pending']}
-📈 Précision: {stats['accuracy']:.1f}%
-
-🎭 Bot de Joker - Développé par Kouamé
-        """
+        # Rendered text is shared by every /stats for a few seconds
+        stats_message = command_coalescer.cached(f'stats {days}', lambda: render_stats_message(days))
 
         if update.message:
             await update.message.reply_text(stats_message)
@@ -432,6 +449,130 @@ async def deploy_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         if update.message:
             await update.message.reply_text("❌ Une erreur s'est produite. Veuillez réessayer.")
 
+def is_admin(user_id: int) -> bool:
+    """Check if user may run operator commands"""
+    return user_id in ADMIN_USER_IDS
+
+def parse_profile_args(args) -> tuple:
+    """Parse optional [seconds] [top] arguments of the profiling commands"""
+    seconds = float(PROFILE_DEFAULT_SECONDS)
+    top_n = PROFILE_TOP_N
+    try:
+        if args:
+            seconds = float(args[0])
+        if args and len(args) > 1:
+            top_n = int(args[1])
+    except ValueError:
+        pass
+    return max(0.1, min(seconds, PROFILE_MAX_SECONDS)), max(1, min(top_n, 100))
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /profile command to run a sampling CPU profile (admin only)"""
+    try:
+        user = update.effective_user
+        chat = update.effective_chat
+
+        if not user or not is_admin(user.id):
+            return
+
+        seconds, top_n = parse_profile_args(context.args)
+        logger.info(f"Profile command from user {user.id} for {seconds}s")
+
+        if update.message:
+            await update.message.reply_text(f"🔥 Profilage CPU pendant {seconds:g}s...")
+
+        stacks, samples = await diagnostics.cpu_profile(seconds)
+        report = diagnostics.format_cpu_report(stacks, samples, top_n)
+        report += "\n\n" + diagnostics.format_container_sizes(card_predictor)
+
+        if update.message:
+            await update.message.reply_text(report[:4000])
+        if chat and stacks:
+            await context.bot.send_document(
+                chat_id=chat.id,
+                document=io.BytesIO(diagnostics.format_collapsed_stacks(stacks).encode('utf-8')),
+                filename="cpu_profile.collapsed",
+                caption="📈 Piles compressées (flamegraph.pl / speedscope)"
+            )
+
+    except Exception as e:
+        logger.error(f"Error in profile_command: {e}")
+        if update.message:
+            await update.message.reply_text("❌ Une erreur s'est produite. Veuillez réessayer.")
+
+async def memprofile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /memprofile command to run a tracemalloc snapshot (admin only)"""
+    try:
+        user = update.effective_user
+
+        if not user or not is_admin(user.id):
+            return
+
+        seconds, top_n = parse_profile_args(context.args)
+        logger.info(f"Memory profile command from user {user.id} for {seconds}s")
+
+        if update.message:
+            await update.message.reply_text(f"🧠 Profilage mémoire pendant {seconds:g}s...")
+
+        report = await diagnostics.memory_profile(seconds, top_n)
+        report += "\n\n" + diagnostics.format_container_sizes(card_predictor)
+
+        if update.message:
+            await update.message.reply_text(report[:4000])
+
+    except Exception as e:
+        logger.error(f"Error in memprofile_command: {e}")
+        if update.message:
+            await update.message.reply_text("❌ Une erreur s'est produite. Veuillez réessayer.")
+
+async def shadow_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /shadow command to show shadow strategy accuracy (admin only)"""
+    try:
+        user = update.effective_user
+
+        if not user or not is_admin(user.id):
+            return
+
+        logger.info(f"Shadow command from user {user.id}")
+
+        if update.message:
+            await update.message.reply_text(shadow_runner.report()[:4000])
+
+    except Exception as e:
+        logger.error(f"Error in shadow_command: {e}")
+        if update.message:
+            await update.message.reply_text("❌ Une erreur s'est produite. Veuillez réessayer.")
+
+async def reload_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /reload command to reload prediction rules and templates (admin only)"""
+    try:
+        user = update.effective_user
+
+        if not user or not is_admin(user.id):
+            return
+
+        logger.info(f"Reload command from user {user.id}")
+
+        try:
+            prediction_engine.reload_rules()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to reload prediction rules: {e}")
+            if update.message:
+                await update.message.reply_text(f"❌ Règles non rechargées, les anciennes restent actives : {e}")
+            return
+
+        rules = card_predictor.rules
+        if update.message:
+            await update.message.reply_text(
+                f"🔄 Règles rechargées : {len(rules.card_symbols)} symboles, "
+                f"{len(rules.valid_combinations)} combinaisons\n{rules.prediction_message}"
+            )
+
+    except Exception as e:
+        logger.error(f"Error in reload_command: {e}")
+        if update.message:
+            await update.message.reply_text("❌ Une erreur s'est produite. Veuillez réessayer.")
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle errors"""
     logger.error(f"Exception while handling an update: {context.error}")
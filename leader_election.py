@@ -0,0 +1,55 @@
+"""
+Local leader election for Joker's Telegram Bot
+Processes on the same host compete for an exclusive OS file lock; the holder polls Telegram
+"""
+
+import fcntl
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FileLeaderLock:
+    """Exclusive flock held for the lifetime of the leader process"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        """Take the lock without blocking; the OS releases it if this process dies"""
+        if self.fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        # Record the leader's pid for operators
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self.fd = fd
+        return True
+
+    def wait(self, poll_interval: float, on_standby: Callable[[], None]) -> None:
+        """Block until this process is leader, calling on_standby between attempts"""
+        announced = False
+        while not self.try_acquire():
+            if not announced:
+                logger.info(f"Another process holds {self.path}, running as standby")
+                announced = True
+            on_standby()
+            time.sleep(poll_interval)
+        logger.info(f"Acquired leadership lock {self.path} (pid {os.getpid()})")
+
+    def release(self) -> None:
+        """Give up leadership"""
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,88 @@
+"""
+Priority-aware load shedding for Joker's Telegram Bot
+Drops low-value work while the update backlog or event-loop lag is too high
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Optional
+
+from config import SHED_BACKLOG_THRESHOLD, SHED_LAG_SECONDS
+from loop_watchdog import LoopWatchdog, loop_watchdog
+
+logger = logging.getLogger(__name__)
+
+# Work that may be dropped under load; game messages are never shed
+SHED_CATEGORIES = ('private_reply', 'static_command', 'verbose_log')
+
+
+class LoadShedder:
+    """Decides when low-priority work is dropped and counts what was shed"""
+
+    def __init__(self, backlog_threshold: int, lag_threshold: float, watchdog: LoopWatchdog):
+        self.backlog_threshold = backlog_threshold
+        self.lag_threshold = lag_threshold
+        self.watchdog = watchdog
+        self.update_queue = None
+        self.shed: Counter = Counter()
+        self._was_overloaded = False
+
+    def attach(self, application) -> None:
+        """Watch the backlog of the application's update queue"""
+        self.update_queue = application.update_queue
+
+    def backlog(self) -> int:
+        """Updates received but not yet processed"""
+        return self.update_queue.qsize() if self.update_queue is not None else 0
+
+    def is_overloaded(self) -> bool:
+        """True while backlog or loop lag is above its threshold"""
+        overloaded = self.backlog() >= self.backlog_threshold or self.watchdog.last_lag >= self.lag_threshold
+        if overloaded != self._was_overloaded:
+            self._was_overloaded = overloaded
+            # Logged at WARNING so the state change itself is never shed
+            logger.warning(f"Load shedding {'enabled' if overloaded else 'disabled'} (backlog {self.backlog()}, lag {self.watchdog.last_lag * 1000:.0f} ms)")
+        return overloaded
+
+    def should_shed(self, category: str) -> bool:
+        """Check if work of this category must be dropped now, counting it if so"""
+        if self.is_overloaded():
+            self.shed[category] += 1
+            return True
+        return False
+
+    def snapshot(self) -> Dict:
+        """Backlog, state and shed counts per category"""
+        return {
+            'backlog': self.backlog(),
+            'overloaded': self._was_overloaded,
+            'shed': {category: self.shed[category] for category in SHED_CATEGORIES},
+        }
+
+
+class SheddingLogFilter(logging.Filter):
+    """Drops records below WARNING while the bot is overloaded"""
+
+    def __init__(self, shedder: LoadShedder):
+        super().__init__()
+        self.shedder = shedder
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        # The filter sits on every root handler: decide (and count) once per record
+        shed = getattr(record, 'shed', None)
+        if shed is None:
+            shed = record.shed = self.shedder.should_shed('verbose_log')
+        return not shed
+
+
+def install_log_shedding(shedder: LoadShedder, logger_instance: Optional[logging.Logger] = None) -> None:
+    """Attach the shedding filter to every handler of the given (default root) logger"""
+    log_filter = SheddingLogFilter(shedder)
+    for handler in (logger_instance or logging.getLogger()).handlers:
+        handler.addFilter(log_filter)
+
+
+# Global instance
+load_shedder = LoadShedder(SHED_BACKLOG_THRESHOLD, SHED_LAG_SECONDS, loop_watchdog)
@@ -0,0 +1,151 @@
+"""
+Event-loop lag watchdog for Joker's Telegram Bot
+Measures loop lag, attributes stalls to the running handler and serves health checks
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from config import WATCHDOG_INTERVAL, LAG_WARNING_SECONDS, READY_MAX_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """Continuously measures event-loop lag and records what was blocking it"""
+
+    def __init__(self, interval: float = 0.1, lag_threshold: float = 0.25, ready_max_lag: float = 1.0):
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.ready_max_lag = ready_max_lag
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_beat = time.monotonic()
+        # Tracked handler running in each task; handlers of different tasks interleave on the loop
+        self.active_handlers: Dict[asyncio.Task, Tuple[str, float]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.spikes: Deque[Dict] = deque(maxlen=20)
+        self._loop_thread_id: Optional[int] = None
+        self._stall_capture: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def track(self, handler: Callable) -> Callable:
+        """Wrap an async handler so stalls can be attributed to it"""
+
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            task = asyncio.current_task()
+            previous = self.active_handlers.get(task)
+            self.active_handlers[task] = (handler.__name__, time.monotonic())
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                if previous is None:
+                    del self.active_handlers[task]
+                else:
+                    self.active_handlers[task] = previous
+
+        return wrapper
+
+    def start(self) -> None:
+        """Start the lag probe on the running loop and the stall monitor thread"""
+        self._loop_thread_id = threading.get_ident()
+        self._loop = asyncio.get_running_loop()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._probe())
+        self._monitor = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._monitor.start()
+        logger.info(f"Loop watchdog started (threshold {self.lag_threshold * 1000:.0f} ms)")
+
+    async def stop(self) -> None:
+        """Stop the probe and the monitor thread"""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe(self) -> None:
+        """Sleep for a fixed interval and measure how late the loop wakes us up"""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.last_beat = now
+
+            if lag >= self.lag_threshold:
+                capture = self._stall_capture or {}
+                self._stall_capture = None
+                spike = {
+                    'at': time.time(),
+                    'lag_ms': round(lag * 1000, 1),
+                    'handler': capture.get('handler'),
+                    'stack': capture.get('stack', []),
+                }
+                self.spikes.append(spike)
+                logger.warning(f"Event loop lag {spike['lag_ms']} ms while running {spike['handler'] or 'unknown'}")
+
+    def _watch(self) -> None:
+        """Capture the blocking handler and stack while the loop is stalled"""
+        while not self._stop.wait(self.interval):
+            stalled_for = time.monotonic() - self.last_beat - self.interval
+            if stalled_for < self.lag_threshold or self._stall_capture is not None:
+                continue
+
+            # The stalled task is the one the loop is running right now
+            active = self.active_handlers.get(asyncio.current_task(self._loop))
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = []
+            while frame is not None and len(stack) < 8:
+                stack.append(f"{frame.f_code.co_name} ({frame.f_code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            self._stall_capture = {'handler': active[0] if active else None, 'stack': stack}
+
+    def is_stalled(self) -> bool:
+        """True if the loop has not completed a probe cycle recently"""
+        return time.monotonic() - self.last_beat - self.interval > self.ready_max_lag
+
+    def snapshot(self) -> Dict:
+        """Current lag figures and recent spikes"""
+        return {
+            'lag_ms': round(self.last_lag * 1000, 1),
+            'max_lag_ms': round(self.max_lag * 1000, 1),
+            'active_handlers': sorted(name for name, _ in list(self.active_handlers.values())),
+            'recent_spikes': list(self.spikes),
+        }
+
+
+def add_health_routes(server, watchdog: LoopWatchdog, is_ready: Callable[[], bool]) -> None:
+    """Register /healthz and /readyz on the diagnostics server"""
+
+    async def healthz(query):
+        # Answering at all proves the loop is alive; a wedged loop times out the supervisor
+        body = {'status': 'ok', **watchdog.snapshot()}
+        return 200, 'application/json', json.dumps(body, ensure_ascii=False)
+
+    async def readyz(query):
+        ready = is_ready() and not watchdog.is_stalled() and watchdog.last_lag < watchdog.ready_max_lag
+        body = {'status': 'ready' if ready else 'not ready', 'lag_ms': round(watchdog.last_lag * 1000, 1)}
+        return (200 if ready else 503), 'application/json', json.dumps(body)
+
+    server.add_route('/healthz', healthz)
+    server.add_route('/readyz', readyz)
+
+# Global instance
+loop_watchdog = LoopWatchdog(WATCHDOG_INTERVAL, LAG_WARNING_SECONDS, READY_MAX_LAG_SECONDS)
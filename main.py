@@ -2,11 +2,10 @@
 Joker's Telegram Bot - Deployment Version
 Main entry point for the bot application
 """
-import asyncio
 import logging
-import os
+import signal
 import sys
-from bot import TelegramBot
+from config import get_settings, STANDBY_POLL_SECONDS, ANALYTICS_SAVE_SECONDS
 
 # Configure logging
 logging.basicConfig(
@@ -20,20 +19,67 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-async def main():
+def main():
     """Main function to run the bot"""
     try:
-        # Check for required environment variables
-        bot_token = os.getenv('BOT_TOKEN')
-        if not bot_token:
-            logger.error("BOT_TOKEN environment variable is required")
+        # Check for required settings before loading the Telegram stack
+        settings = get_settings()
+        try:
+            settings.require_bot_token()
+        except ValueError as e:
+            logger.error(str(e))
             sys.exit(1)
         
         logger.info("Starting Joker's Telegram Bot (Deployment Version)...")
         
-        # Create and start the bot
+        from bot import TelegramBot
+        from card_predictor import card_predictor
+        from prediction_engine import prediction_engine
+        from leader_election import FileLeaderLock
+        from state_store import StateJournal, JournalFollower
+        from event_log import EventLogWriter
+        from analytics_store import DailyRollupStore
+
+        # Rules file overrides the defaults from config.py
+        if settings.rules_path:
+            prediction_engine.reload_rules()
+            logger.info(f"Loaded prediction rules from {settings.rules_path}")
+
+        # Restore persisted prediction state
+        follower = None
+        if settings.state_journal_path:
+            follower = JournalFollower(StateJournal(settings.state_journal_path), card_predictor)
+            restored = follower.catch_up()
+            logger.info(f"Restored {restored} prediction changes from {settings.state_journal_path}")
+
+        # Build the application up front so a standby only has to start polling
         bot = TelegramBot()
-        await bot.start()
+
+        if settings.leader_lock_path:
+            if not follower:
+                logger.warning("LEADER_LOCK_PATH is set without STATE_JOURNAL_PATH: a standby will take over with empty state")
+            lock = FileLeaderLock(settings.leader_lock_path)
+            # Until polling starts, SIGHUP still reloads rules instead of killing the standby
+            signal.signal(signal.SIGHUP, lambda signum, frame: bot.reload_rules())
+            # Standby: keep predictor state warm until the leader's lock is released
+            lock.wait(STANDBY_POLL_SECONDS, follower.catch_up if follower else lambda: None)
+            if follower:
+                follower.catch_up()
+            # The rules file may have changed while this process waited
+            if settings.rules_path:
+                bot.reload_rules()
+
+        # Only the leader writes to the journal, the event log and the analytics rollups
+        if follower:
+            card_predictor.journal = follower.journal
+        if settings.event_log_dir:
+            prediction_engine.event_log = EventLogWriter(settings.event_log_dir, settings.event_log_segment_mb * 1024 * 1024)
+        if settings.analytics_path:
+            # Opened after taking the lock, so a standby picks up everything the previous leader saved
+            prediction_engine.analytics = DailyRollupStore(settings.analytics_path, ANALYTICS_SAVE_SECONDS)
+
+        # run_polling owns the event loop until the bot stops
+        bot.start()
         
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
@@ -42,4 +88,4 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -0,0 +1,163 @@
+"""
+Telegram-independent streaming interface to the card prediction engine
+Turns game message events into typed send/edit actions
+"""
+
+import logging
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from card_predictor import CardPredictor, card_predictor, parse_game_message
+from analytics_store import FAILED, DailyRollupStore
+from config import REORDER_MAX_WAIT_SECONDS, REORDER_RESET_GAP, RULES_PATH
+from prediction_rules import load_rules
+from event_log import EventLogWriter
+from reorder_buffer import ReorderBuffer
+from shadow import ShadowRunner, shadow_runner
+
+logger = logging.getLogger(__name__)
+
+
+class MessageEvent(NamedTuple):
+    """A game message read from a source chat"""
+    chat_id: int
+    message_id: int
+    text: str
+    is_edit: bool = False
+
+
+class SendPrediction(NamedTuple):
+    """Publish a new prediction for a game"""
+    source_chat_id: int
+    predicted_game: int
+    text: str
+
+
+class EditStatus(NamedTuple):
+    """Update every sent copy of a prediction with its verified status"""
+    predicted_game: int
+    text: str
+
+
+Action = Union[SendPrediction, EditStatus]
+
+
+class PredictionEngine:
+    """Drives a CardPredictor from a stream of message events"""
+
+    def __init__(self, predictor: CardPredictor, shadow: Optional[ShadowRunner] = None,
+                 reorder: Optional[ReorderBuffer] = None, event_log: Optional[EventLogWriter] = None,
+                 analytics: Optional[DailyRollupStore] = None):
+        self.predictor = predictor
+        self.shadow = shadow
+        self.reorder = reorder
+        self.event_log = event_log
+        self.analytics = analytics
+        self.last_game: Dict[int, int] = {}  # source chat -> highest game of its current run
+
+    def handle(self, event: MessageEvent) -> List[Action]:
+        """Process one event (after reordering) and return the actions it triggers"""
+        parsed = parse_game_message(event.text, self.predictor.rules)
+        if parsed is not None and self.event_log is not None:
+            try:
+                self.event_log.append(event.chat_id, event.message_id, parsed, event.is_edit)
+            except OSError as e:
+                logger.error(f"Failed to append to event log: {e}")
+        if self.reorder is None:
+            return self._process(event, parsed)
+
+        actions: List[Action] = []
+        game_number = parsed.game_number if parsed else None
+        for ready_event, ready_parsed in self.reorder.push(event.chat_id, game_number, (event, parsed)):
+            actions.extend(self._process(ready_event, ready_parsed))
+        return actions
+
+    def flush_expired(self, now: Optional[float] = None) -> List[Action]:
+        """Process messages whose wait for earlier games expired"""
+        actions: List[Action] = []
+        if self.reorder is not None:
+            for event, parsed in self.reorder.flush_expired(now):
+                actions.extend(self._process(event, parsed))
+        return actions
+
+    def _process(self, event: MessageEvent, parsed) -> List[Action]:
+        """Run the prediction rules on one in-order event"""
+        actions: List[Action] = []
+        predictor = self.predictor
+        if parsed is not None:
+            self._follow_game_counter(event.chat_id, parsed.game_number)
+
+        should_predict, game_number, combination = predictor.should_predict(event.text)
+        if should_predict and game_number is not None and combination is not None:
+            # A game of this run already predicted (here or by a previous leader) is never announced twice
+            if game_number + 1 in predictor.predictions:
+                logger.info(f"Game {game_number + 1} already predicted, not sending again")
+            else:
+                text = predictor.make_prediction(game_number, combination)
+                actions.append(SendPrediction(event.chat_id, game_number + 1, text))
+
+        verification_result = predictor.verify_prediction(event.text)
+        if verification_result and verification_result['type'] == 'update_message':
+            predicted_game = verification_result['predicted_game']
+            # The copies are looked up when the edit is dispatched: the prediction may be
+            # released in the same batch and not be sent yet
+            actions.append(EditStatus(predicted_game, verification_result['new_message']))
+            if self.analytics is not None:
+                prediction = predictor.predictions[predicted_game]
+                outcome = prediction.verification_count if prediction.status == 'correct' else FAILED
+                self.analytics.record(prediction.combination, outcome)
+
+        # Strategy variants only keep statistics, the primary predictor alone sends
+        if self.shadow is not None:
+            self.shadow.observe(event.text, parsed)
+
+        return actions
+
+    def _follow_game_counter(self, chat_id: int, game_number: int) -> None:
+        """Archive the predictions of the previous run once the game counter restarts
+
+        Events arrive here in order, so a drop larger than the reorder reset gap is a new run.
+        """
+        last = self.last_game.get(chat_id)
+        if last is None:
+            # First message since startup: compare with the predictions restored from the journal
+            last = max(self.predictor.predictions, default=game_number) - 1
+        if last - game_number > REORDER_RESET_GAP:
+            logger.info(f"Chat {chat_id}: game counter restarted at {game_number}, archiving {len(self.predictor.predictions)} predictions")
+            self.predictor.archive_predictions()
+            last = game_number
+        self.last_game[chat_id] = max(last, game_number)
+
+    def reload_rules(self, path: Optional[str] = None) -> None:
+        """Load and compile rules, then swap them in; a bad file leaves the current rules untouched"""
+        self.predictor.reload_rules(load_rules(path or RULES_PATH))
+
+    def record_sent(self, predicted_game: int, messages: List[Tuple[int, int]]) -> None:
+        """Remember where a prediction was published so status edits can reach it"""
+        if messages:
+            self.predictor.record_sent(predicted_game, messages)
+
+    def sent_messages(self, predicted_game: int) -> List[Tuple[int, int]]:
+        """(chat_id, message_id) of every published copy of a prediction"""
+        return list(self.predictor.sent_predictions.get(predicted_game, ()))
+
+    def run(self, events: Iterable[MessageEvent]) -> Iterable[Action]:
+        """Synchronously process an iterable of events (replays, benchmarks)"""
+        for event in events:
+            yield from self.handle(MessageEvent(*event))
+        # End of input: nothing else will fill the gaps
+        yield from self.flush_expired(float('inf'))
+
+    async def stream(self, events: AsyncIterable[MessageEvent]) -> AsyncIterator[Action]:
+        """Process an async stream of events, yielding actions as they are produced"""
+        async for event in events:
+            for action in self.handle(MessageEvent(*event)) + self.flush_expired():
+                yield action
+        for action in self.flush_expired(float('inf')):
+            yield action
+
+
+# Global instance; the event log and analytics files are attached by main(), never at import
+prediction_engine = PredictionEngine(
+    card_predictor, shadow_runner,
+    ReorderBuffer(REORDER_MAX_WAIT_SECONDS, REORDER_RESET_GAP)
+)
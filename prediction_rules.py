@@ -0,0 +1,92 @@
+"""
+Prediction rules for Joker's Telegram Bot
+Card symbols, combinations, progress emojis and message template, compiled for lookups and reloadable at runtime
+"""
+
+import json
+import logging
+from typing import Dict, FrozenSet, NamedTuple, Optional, Sequence, Tuple
+
+from config import (
+    VALID_CARD_COMBINATIONS, CARD_SYMBOLS, PREDICTION_MESSAGE,
+    TEMPORARY_EMOJIS, FINAL_EMOJIS
+)
+
+logger = logging.getLogger(__name__)
+
+# Placeholder replaced by the verification status in the prediction message
+PENDING_STATUS = 'statut :⏳'
+
+
+class PredictionRules(NamedTuple):
+    """One immutable, compiled rule set; swapping the whole object is atomic"""
+    card_symbols: Tuple[str, ...]
+    valid_combinations: Tuple[str, ...]
+    valid_combination_sets: FrozenSet[FrozenSet[str]]
+    temporary_emojis: Tuple[str, ...]
+    final_emojis: Tuple[str, ...]
+    prediction_message: str
+
+
+def compile_rules(card_symbols: Sequence[str], valid_combinations: Sequence[str],
+                  temporary_emojis: Sequence[str], final_emojis: Sequence[str],
+                  prediction_message: str) -> PredictionRules:
+    """Validate raw rule values and precompute their lookup structures"""
+    for name, values in (('card_symbols', card_symbols), ('valid_card_combinations', valid_combinations),
+                         ('temporary_emojis', temporary_emojis), ('final_emojis', final_emojis)):
+        # A plain string would silently be split into single characters
+        if not isinstance(values, (list, tuple)) or not all(isinstance(value, str) and value for value in values):
+            raise ValueError(f"{name} must be a list of non-empty strings")
+    if not card_symbols:
+        raise ValueError("card_symbols must not be empty")
+    if not final_emojis:
+        raise ValueError("final_emojis must not be empty")
+    if not isinstance(prediction_message, str) or '{numero}' not in prediction_message:
+        raise ValueError("prediction_message must contain {numero}")
+    # Render it once so a bad template is refused here, not on every later prediction
+    try:
+        rendered = prediction_message.format(numero=0)
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"prediction_message can only use the {{numero}} placeholder: {e!r}") from e
+    if PENDING_STATUS not in rendered:
+        raise ValueError(f"prediction_message must contain '{PENDING_STATUS}'")
+
+    return PredictionRules(
+        card_symbols=tuple(card_symbols),
+        valid_combinations=tuple(valid_combinations),
+        valid_combination_sets=frozenset(frozenset(combination) for combination in valid_combinations),
+        temporary_emojis=tuple(temporary_emojis),
+        final_emojis=tuple(final_emojis),
+        prediction_message=prediction_message,
+    )
+
+
+def default_rules() -> PredictionRules:
+    """Rules built from the defaults in config.py"""
+    return compile_rules(CARD_SYMBOLS, VALID_CARD_COMBINATIONS, TEMPORARY_EMOJIS, FINAL_EMOJIS, PREDICTION_MESSAGE)
+
+
+def load_rules(path: Optional[str]) -> PredictionRules:
+    """Rules from a JSON file; keys that are absent keep their config.py default"""
+    if not path:
+        return default_rules()
+
+    with open(path, encoding='utf-8') as f:
+        values: Dict = json.load(f)
+
+    defaults = {
+        'card_symbols': CARD_SYMBOLS,
+        'valid_card_combinations': VALID_CARD_COMBINATIONS,
+        'temporary_emojis': TEMPORARY_EMOJIS,
+        'final_emojis': FINAL_EMOJIS,
+        'prediction_message': PREDICTION_MESSAGE,
+    }
+    unknown = set(values) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown rule keys in {path}: {', '.join(sorted(unknown))}")
+    defaults.update(values)
+
+    return compile_rules(
+        defaults['card_symbols'], defaults['valid_card_combinations'],
+        defaults['temporary_emojis'], defaults['final_emojis'], defaults['prediction_message']
+    )
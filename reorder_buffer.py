@@ -0,0 +1,116 @@
+"""
+Per-chat reorder buffer for game messages
+Releases messages in game-number order, waiting a bounded time for missing games
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _ChatOrder:
+    """Ordering state of one source chat"""
+
+    __slots__ = ('next_expected', 'held')
+
+    def __init__(self, next_expected: int):
+        self.next_expected = next_expected
+        self.held: Dict[int, List[Tuple[float, Any]]] = {}  # game -> [(deadline, item)]
+
+
+class ReorderBuffer:
+    """Holds early game messages until the games before them arrive or the wait expires"""
+
+    def __init__(self, max_wait: float = 2.0, reset_gap: int = 100, max_held: int = 256):
+        self.max_wait = max_wait
+        self.reset_gap = reset_gap
+        self.max_held = max_held
+        self.chats: Dict[int, _ChatOrder] = {}
+        self.reordered = 0  # messages released after waiting for earlier games
+        self.gaps = 0  # times the wait expired with games missing
+        self.missing_games = 0
+
+    def push(self, chat_id: int, game_number: Optional[int], item: Any, now: Optional[float] = None) -> List[Any]:
+        """Add a message and return the items that can be processed now, in order"""
+        if game_number is None:
+            return [item]
+        now = time.monotonic() if now is None else now
+
+        state = self.chats.get(chat_id)
+        if state is None:
+            self.chats[chat_id] = _ChatOrder(game_number + 1)
+            return [item]
+
+        if game_number < state.next_expected:
+            if state.next_expected - game_number > self.reset_gap:
+                # Game counter restarted: drain what we hold and follow the new sequence
+                logger.info(f"Chat {chat_id}: game numbers restarted at {game_number}")
+                released = self._drain(state)
+                state.next_expected = game_number + 1
+                return released + [item]
+            # Edits and repeats of games already released need no ordering
+            return [item]
+
+        if game_number - state.next_expected > self.reset_gap:
+            logger.info(f"Chat {chat_id}: game numbers jumped to {game_number}")
+            released = self._drain(state)
+            state.next_expected = game_number + 1
+            return released + [item]
+
+        if game_number == state.next_expected:
+            state.next_expected += 1
+            return [item] + self._release_consecutive(state)
+
+        state.held.setdefault(game_number, []).append((now + self.max_wait, item))
+        if len(state.held) > self.max_held:
+            return self._skip_gap(chat_id, state)
+        return []
+
+    def flush_expired(self, now: Optional[float] = None) -> List[Any]:
+        """Release held messages whose wait expired, recording the gaps skipped"""
+        now = time.monotonic() if now is None else now
+        released: List[Any] = []
+        for chat_id, state in self.chats.items():
+            while state.held and min(deadline for entries in state.held.values() for deadline, _ in entries) <= now:
+                released.extend(self._skip_gap(chat_id, state))
+        return released
+
+    def pending(self) -> int:
+        """Number of messages currently held"""
+        return sum(len(entries) for state in self.chats.values() for entries in state.held.values())
+
+    def _release_consecutive(self, state: _ChatOrder) -> List[Any]:
+        """Release held games that now follow on from the expected one"""
+        released: List[Any] = []
+        while state.next_expected in state.held:
+            released.extend(item for _, item in state.held.pop(state.next_expected))
+            state.next_expected += 1
+            self.reordered += 1
+        return released
+
+    def _skip_gap(self, chat_id: int, state: _ChatOrder) -> List[Any]:
+        """Give up on the missing games before the earliest held one"""
+        first_held = min(state.held)
+        missing = first_held - state.next_expected
+        self.gaps += 1
+        self.missing_games += missing
+        logger.warning(f"Chat {chat_id}: games {state.next_expected}-{first_held - 1} missing, continuing from {first_held}")
+        state.next_expected = first_held
+        return self._release_consecutive(state)
+
+    def _drain(self, state: _ChatOrder) -> List[Any]:
+        """Release everything held, in game order"""
+        released = [item for game in sorted(state.held) for _, item in state.held[game]]
+        state.held.clear()
+        return released
+
+    def snapshot(self) -> Dict:
+        """Counters for /metrics"""
+        return {
+            'held': self.pending(),
+            'reordered': self.reordered,
+            'gaps': self.gaps,
+            'missing_games': self.missing_games,
+        }
@@ -0,0 +1,173 @@
+"""
+Shadow-mode evaluation of prediction strategies for Joker's Telegram Bot
+Variants of the prediction rule run on the live feed and keep their own stats, without sending
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from card_predictor import ParsedGameMessage, parse_game_message
+from config import SHADOW_STRATEGIES
+
+logger = logging.getLogger(__name__)
+
+# Resolved games remembered per strategy to avoid predicting the same game twice
+RESOLVED_HISTORY = 4096
+
+PARENTHESES_CHOICES = {'first': (0,), 'second': (1,), 'both': (0, 1)}
+
+
+def combination_key(combination: str, card_symbols: Sequence[str]) -> FrozenSet[str]:
+    """Symbols of the given rule set present in a combination string"""
+    return frozenset(symbol for symbol in card_symbols if symbol in combination)
+
+
+class ShadowStrategy:
+    """One prediction rule variant with its own pending predictions and incremental stats"""
+
+    def __init__(self, name: str, parentheses: str = 'both', max_offset: int = 3,
+                 min_distinct: int = 3, max_distinct: int = 3, skip_temporary: bool = True,
+                 verify_min_cards: int = 3, combinations: Optional[Iterable[str]] = None):
+        if parentheses not in PARENTHESES_CHOICES:
+            raise ValueError(f"Unknown parentheses choice for strategy {name}: {parentheses}")
+        self.name = name
+        self.groups = PARENTHESES_CHOICES[parentheses]
+        self.max_offset = max_offset
+        self.min_distinct = min_distinct
+        self.max_distinct = max_distinct
+        self.skip_temporary = skip_temporary
+        self.verify_min_cards = verify_min_cards
+        self.combinations = tuple(combinations) if combinations else None
+        # Combination filters as symbol sets, recompiled whenever the parsed symbols change (rules reload)
+        self._keys_for: Optional[Tuple[str, ...]] = None
+        self._keys: Set[FrozenSet[str]] = set()
+
+        self.pending: Dict[int, FrozenSet[str]] = {}  # predicted game -> suit combination
+        self.resolved: 'OrderedDict[int, None]' = OrderedDict()
+        self.total = 0
+        self.hits = [0] * (max_offset + 1)
+        self.failed = 0
+
+    def _combination_keys(self, card_symbols: Tuple[str, ...]) -> Set[FrozenSet[str]]:
+        """Allowed combinations as symbol sets of the rules the message was parsed with"""
+        if card_symbols is not self._keys_for:
+            self._keys = {combination_key(combination, card_symbols) for combination in self.combinations}
+            self._keys_for = card_symbols
+        return self._keys
+
+    def _combination(self, parsed: ParsedGameMessage) -> Optional[FrozenSet[str]]:
+        """First eligible suit combination in the selected parentheses"""
+        for index in self.groups:
+            if index >= len(parsed.suit_counts):
+                continue
+            suits = frozenset(symbol for symbol, count in zip(parsed.card_symbols, parsed.suit_counts[index]) if count)
+            if self.min_distinct <= len(suits) <= self.max_distinct:
+                if self.combinations is None or suits in self._combination_keys(parsed.card_symbols):
+                    return suits
+        return None
+
+    def _resolve(self, predicted_game: int) -> None:
+        """Move a prediction out of the pending set"""
+        del self.pending[predicted_game]
+        self.resolved[predicted_game] = None
+        if len(self.resolved) > RESOLVED_HISTORY:
+            self.resolved.popitem(last=False)
+
+    def observe(self, parsed: ParsedGameMessage) -> None:
+        """Apply the prediction and verification rules of this strategy to one message"""
+        game_number = parsed.game_number
+
+        # Verification: only games within the offset window can be affected
+        first_cards = sum(parsed.suit_counts[0]) if parsed.suit_counts else 0
+        success = parsed.is_final and first_cards >= self.verify_min_cards
+        for offset in range(self.max_offset + 1):
+            predicted_game = game_number - offset
+            if predicted_game not in self.pending:
+                continue
+            if success:
+                self.hits[offset] += 1
+                self._resolve(predicted_game)
+            elif offset == self.max_offset:
+                self.failed += 1
+                self._resolve(predicted_game)
+
+        # Prediction
+        if self.skip_temporary and parsed.is_temporary:
+            return
+        next_game = game_number + 1
+        if next_game in self.pending or next_game in self.resolved:
+            return
+        combination = self._combination(parsed)
+        if combination is not None:
+            self.pending[next_game] = combination
+            self.total += 1
+
+    def stats(self) -> Dict:
+        """Accuracy over resolved predictions"""
+        correct = sum(self.hits)
+        resolved = correct + self.failed
+        return {
+            'name': self.name,
+            'total': self.total,
+            'correct': correct,
+            'hits_by_offset': list(self.hits),
+            'failed': self.failed,
+            'pending': len(self.pending),
+            'accuracy': (correct / resolved * 100) if resolved else 0,
+        }
+
+
+class ShadowRunner:
+    """Evaluates several strategies on every message from a single shared parse"""
+
+    def __init__(self, strategies: List[ShadowStrategy]):
+        self.strategies = strategies
+        self.messages = 0
+        self.elapsed_ns = 0
+
+    def observe(self, message: str, parsed: Optional[ParsedGameMessage] = None) -> None:
+        """Feed one message to every strategy, measuring the added cost"""
+        if not self.strategies:
+            return
+        started = time.perf_counter_ns()
+        if parsed is None:
+            parsed = parse_game_message(message)
+        if parsed is not None:
+            for strategy in self.strategies:
+                strategy.observe(parsed)
+        self.elapsed_ns += time.perf_counter_ns() - started
+        self.messages += 1
+
+    @property
+    def cost_per_message_us(self) -> float:
+        """Average added processing time per message, in microseconds"""
+        return self.elapsed_ns / self.messages / 1000 if self.messages else 0.0
+
+    def report(self) -> str:
+        """Format per-strategy accuracy and the measured overhead"""
+        lines = [f"🧪 Stratégies fantômes - {self.messages} messages, {self.cost_per_message_us:.1f} µs/message", ""]
+        for strategy in self.strategies:
+            stats = strategy.stats()
+            hits = ' '.join(f"{offset}:{count}" for offset, count in enumerate(stats['hits_by_offset']))
+            lines.append(
+                f"• {stats['name']}: {stats['total']} prédictions, {stats['accuracy']:.1f}% "
+                f"(✅ {hits} | ❌ {stats['failed']} | ⌛ {stats['pending']})"
+            )
+        return '\n'.join(lines)
+
+
+def build_strategies(configs: List[Dict]) -> List[ShadowStrategy]:
+    """Create strategies from configuration dicts, skipping invalid ones"""
+    strategies = []
+    for strategy_config in configs:
+        try:
+            strategies.append(ShadowStrategy(**strategy_config))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid shadow strategy {strategy_config}: {e}")
+    return strategies
+
+
+# Global instance
+shadow_runner = ShadowRunner(build_strategies(SHADOW_STRATEGIES))
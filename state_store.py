@@ -0,0 +1,70 @@
+"""
+Persisted predictor state for Joker's Telegram Bot
+Append-only JSON-lines journal of prediction changes, tailed by a standby process
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StateJournal:
+    """Appends predictor changes and reads them back from a byte offset"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+
+    def append(self, change: Dict) -> None:
+        """Write one change and flush it so a standby on the same host sees it at once"""
+        if self.file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps(change, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.file.flush()
+
+    def read_from(self, offset: int) -> Tuple[List[Dict], int]:
+        """Complete changes written after offset, and the offset to resume from"""
+        if not os.path.exists(self.path):
+            return [], offset
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # A line still being written by the leader is picked up on the next read
+        end = data.rfind(b'\n') + 1
+        changes = []
+        for line in data[:end].splitlines():
+            try:
+                changes.append(json.loads(line))
+            except ValueError:
+                logger.error(f"Skipping corrupt journal line: {line[:80]!r}")
+        return changes, offset + end
+
+    def close(self) -> None:
+        """Close the append handle"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class JournalFollower:
+    """Keeps a predictor in sync with a journal written by another process"""
+
+    def __init__(self, journal: StateJournal, predictor):
+        self.journal = journal
+        self.predictor = predictor
+        self.offset = 0
+        self.applied = 0
+
+    def catch_up(self) -> int:
+        """Apply every change written since the last call, returning how many were applied"""
+        changes, self.offset = self.journal.read_from(self.offset)
+        for change in changes:
+            self.predictor.apply_change(change)
+        self.applied += len(changes)
+        return len(changes)
@@ -0,0 +1,36 @@
+"""
+Behavior checks for the daily analytics rollups
+"""
+
+from datetime import date, timedelta
+
+from analytics_store import FAILED, DailyRollupStore
+
+TODAY = date(2026, 10, 19)
+
+
+def test_rollups_round_trip_and_sum_the_requested_days(tmp_path):
+    path = str(tmp_path / 'daily_stats.bin')
+    store = DailyRollupStore(path)
+    store.record('♠️♥️♦️', 1, TODAY)
+    store.record('♠️♥️♦️', FAILED, TODAY - timedelta(days=6))
+    store.record('♣️♥️♦️', 0, TODAY - timedelta(days=7))  # outside a 7-day window
+    store.save()
+
+    reloaded = DailyRollupStore(path)
+    assert reloaded.last_days(7, TODAY) == {'♠️♥️♦️': [0, 1, 0, 0, 1]}
+    assert reloaded.last_days(8, TODAY)['♣️♥️♦️'] == [1, 0, 0, 0, 0]
+
+
+def test_corrupt_store_is_moved_aside_not_overwritten(tmp_path):
+    path = tmp_path / 'daily_stats.bin'
+    path.write_bytes(b'JKRA\xff\xff\xff\xffgarbage')
+
+    store = DailyRollupStore(str(path))
+    assert store.days == {}
+    aside = list(tmp_path.glob('daily_stats.bin.corrupt-*'))
+    assert len(aside) == 1 and aside[0].read_bytes().endswith(b'garbage')
+
+    store.record('♠️♥️♦️', 0, TODAY)
+    store.save()
+    assert DailyRollupStore(str(path)).last_days(1, TODAY) == {'♠️♥️♦️': [1, 0, 0, 0, 0]}
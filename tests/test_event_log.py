@@ -0,0 +1,63 @@
+"""
+Behavior checks for the binary event log
+"""
+
+import os
+
+from card_predictor import ParsedGameMessage
+from event_log import RECORD, EventLogReader, EventLogWriter, list_segments
+
+CHAT = -100
+
+
+def parsed(game_number, final=False):
+    return ParsedGameMessage(game_number, ((1, 1, 1, 0), (0, 0, 0, 2)), False, final)
+
+
+def write_games(directory, games, **writer_options):
+    writer = EventLogWriter(str(directory), **writer_options)
+    for message_id, game in enumerate(games):
+        writer.append(CHAT, message_id, parsed(game), timestamp=1000.0 + message_id)
+    writer.close()
+    return writer
+
+
+def test_records_round_trip_across_segments(tmp_path):
+    write_games(tmp_path, range(100), segment_bytes=40 * RECORD.size, index_every=8)
+    assert len(list_segments(str(tmp_path))) == 3
+
+    events = list(EventLogReader(str(tmp_path)).scan())
+    assert [event.game_number for event in events] == list(range(100))
+    assert events[5].first_counts == (1, 1, 1, 0)
+    assert events[5].second_counts == (0, 0, 0, 2)
+    assert events[5].timestamp == 1005.0
+
+
+def test_range_uses_sparse_index_and_scans_unindexed_tail(tmp_path):
+    write_games(tmp_path, range(100), index_every=16)
+    segment = list_segments(str(tmp_path))[0]
+    blocks = EventLogReader._blocks(segment)
+    # Six full blocks are indexed; the last 4 records are only reachable by scanning
+    assert blocks[0] == (0, 16, 0, 15)
+    assert len(blocks) == 6
+
+    reader = EventLogReader(str(tmp_path))
+    assert [event.game_number for event in reader.range(30, 35)] == list(range(30, 36))
+    assert [event.game_number for event in reader.range(97, 200)] == [97, 98, 99]
+
+
+def test_range_without_index_falls_back_to_scanning(tmp_path):
+    write_games(tmp_path, range(50), index_every=16)
+    os.remove(list_segments(str(tmp_path))[0] + '.idx')
+    assert [event.game_number for event in EventLogReader(str(tmp_path)).range(20, 22)] == [20, 21, 22]
+
+
+def test_torn_record_is_truncated_when_the_segment_is_reopened(tmp_path):
+    write_games(tmp_path, range(10))
+    segment = list_segments(str(tmp_path))[0]
+    with open(segment, 'ab') as f:
+        f.write(b'\x01' * (RECORD.size // 2))  # crash in the middle of a write
+
+    write_games(tmp_path, [10, 11])
+    assert os.path.getsize(segment) == 12 * RECORD.size
+    assert [event.game_number for event in EventLogReader(str(tmp_path)).scan()] == list(range(12))
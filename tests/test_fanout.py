@@ -0,0 +1,49 @@
+"""
+Behavior checks for the prediction fan-out
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from fanout import PredictionFanout
+
+SOURCE_CHAT = -100
+FAST_CHANNEL = -200
+SLOW_CHANNEL = -300
+
+
+class FakeBot:
+    """Answers sends after a per-chat delay and records edits"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.edits = []
+        self.next_id = 0
+
+    async def send_message(self, chat_id, text):
+        await asyncio.sleep(self.delays.get(chat_id, 0))
+        self.next_id += 1
+        return SimpleNamespace(chat_id=chat_id, message_id=self.next_id)
+
+    async def edit_message_text(self, chat_id, message_id, text):
+        self.edits.append((chat_id, message_id, text))
+
+
+def test_slow_target_does_not_hold_back_fast_one_and_edits_wait_for_sends():
+    async def scenario():
+        bot = FakeBot({SLOW_CHANNEL: 0.2})
+        fanout = PredictionFanout({SOURCE_CHAT: [FAST_CHANNEL, SLOW_CHANNEL]}, timeout=1.0)
+        copies = []
+
+        # send() returns at once; copies arrive as each target answers
+        fanout.send(bot, 745, SOURCE_CHAT, '745 ⏳', copies.extend)
+        await asyncio.sleep(0.05)
+        assert [chat for chat, _ in copies] == [FAST_CHANNEL]
+
+        # The edit is issued while the slow send is still in flight
+        fanout.edit(bot, 745, lambda: list(copies), '745 ✅')
+        await fanout.drain()
+        assert sorted(chat for chat, _, _ in bot.edits) == [SLOW_CHANNEL, FAST_CHANNEL]
+        assert 745 not in fanout.in_flight
+
+    asyncio.run(scenario())
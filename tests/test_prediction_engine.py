@@ -0,0 +1,63 @@
+"""
+Regression checks for the streaming prediction engine
+"""
+
+from card_predictor import CardPredictor
+from prediction_engine import EditStatus, MessageEvent, PredictionEngine, SendPrediction
+from reorder_buffer import ReorderBuffer
+
+SOURCE_CHAT = -100123
+TARGET_MESSAGE = (SOURCE_CHAT, 9001)
+
+
+def test_edit_released_with_its_prediction_reaches_the_sent_copy():
+    """A verification held for the predicting game is dispatched after the prediction is sent"""
+    engine = PredictionEngine(CardPredictor(), reorder=ReorderBuffer(2.0, 100))
+    events = [
+        MessageEvent(SOURCE_CHAT, 1, '#N743. 2(A♣️K♣️) - 1(5♣️)'),
+        MessageEvent(SOURCE_CHAT, 3, '#N745. ✅3(J♠️Q♠️9♠️) - 2(A♣️K♣️)'),  # held until #n744
+        MessageEvent(SOURCE_CHAT, 2, '#N744. 3(K♠️10♥️5♦️) - 2(A♣️)'),
+    ]
+    actions = [action for event in events for action in engine.handle(event)]
+    assert [type(action) for action in actions] == [SendPrediction, EditStatus]
+    assert actions[0].predicted_game == actions[1].predicted_game == 745
+
+    # Adapter side: the copies are looked up when the edit is dispatched
+    edited = []
+    for action in actions:
+        if isinstance(action, SendPrediction):
+            engine.record_sent(action.predicted_game, [TARGET_MESSAGE])
+        else:
+            edited.append((engine.sent_messages(action.predicted_game), action.text))
+    assert edited == [([TARGET_MESSAGE], '🔵745 🔵3K: statut :✅0️⃣')]
+
+
+def test_game_numbers_are_predicted_again_after_the_counter_restarts():
+    """The no-double-send guard only covers the current run of game numbers"""
+    predictor = CardPredictor()
+    engine = PredictionEngine(predictor, reorder=ReorderBuffer(2.0, 100))
+    plain = '#N{}. 2(A♣️K♣️) - 1(5♣️)'
+    three_suits = '#N9. 3(K♠️10♥️5♦️) - 2(A♣️)'
+
+    first_run = [three_suits, '#N10. ✅3(J♠️Q♠️9♠️) - 2(A♣️K♣️)']
+    first_run += [plain.format(game) for game in range(11, 1441)]
+    second_run = [plain.format(game) for game in range(1, 9)] + [three_suits]
+
+    actions = list(engine.run(MessageEvent(SOURCE_CHAT, index, text)
+                              for index, text in enumerate(first_run + second_run)))
+    sends = [action.predicted_game for action in actions if isinstance(action, SendPrediction)]
+    assert sends == [10, 10]
+    assert predictor.predictions[10].status == 'pending'
+    # The first run still counts in the totals
+    stats = predictor.get_prediction_stats()
+    assert (stats['total'], stats['correct'], stats['pending']) == (2, 1, 1)
+
+
+def test_repeated_prediction_within_a_run_is_not_sent_twice():
+    engine = PredictionEngine(CardPredictor())
+    events = [
+        MessageEvent(SOURCE_CHAT, 1, '#N9. 3(K♠️10♥️5♦️) - 2(A♣️)'),
+        MessageEvent(SOURCE_CHAT, 1, '#N9. 3(K♠️10♥️5♦️) - 2(A♣️) ✅', is_edit=True),
+    ]
+    sends = [action for event in events for action in engine.handle(event) if isinstance(action, SendPrediction)]
+    assert [action.predicted_game for action in sends] == [10]
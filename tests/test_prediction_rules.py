@@ -0,0 +1,42 @@
+"""
+Validation checks for reloadable prediction rules
+"""
+
+import json
+
+import pytest
+
+from card_predictor import CardPredictor
+from prediction_engine import PredictionEngine
+from prediction_rules import load_rules
+
+
+def write_rules(tmp_path, **values):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(values, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('values', [
+    {'prediction_message': '🔵{numero} {jeu} statut :⏳'},
+    {'prediction_message': '🔵{numero} {} statut :⏳'},
+    {'prediction_message': '🔵{numero} statut :?'},
+    {'valid_card_combinations': '♥️♠️♦️'},
+    {'final_emojis': '✅'},
+    {'card_symbols': []},
+])
+def test_invalid_rules_are_refused(tmp_path, values):
+    with pytest.raises(ValueError):
+        load_rules(write_rules(tmp_path, **values))
+
+
+def test_bad_reload_keeps_current_rules_and_predictions_working(tmp_path):
+    predictor = CardPredictor()
+    engine = PredictionEngine(predictor)
+    engine.reload_rules(write_rules(tmp_path, prediction_message='🟢{numero} statut :⏳'))
+    current = predictor.rules
+
+    with pytest.raises(ValueError):
+        engine.reload_rules(write_rules(tmp_path, prediction_message='🔵{numero} {jeu} statut :⏳'))
+    assert predictor.rules is current
+    assert predictor.make_prediction(9, '♠️♥️♦️') == '🟢10 statut :⏳'
@@ -0,0 +1,55 @@
+"""
+Behavior checks for the per-chat reorder buffer
+"""
+
+from reorder_buffer import ReorderBuffer
+
+CHAT = -100
+
+
+def push_all(buffer, games, now=0.0):
+    """Push games in the given order, returning everything released"""
+    released = []
+    for game in games:
+        released += buffer.push(CHAT, game, game, now)
+    return released
+
+
+def test_early_game_is_held_until_the_missing_one_arrives():
+    buffer = ReorderBuffer(max_wait=2.0)
+    assert push_all(buffer, [743, 745]) == [743]
+    assert buffer.pending() == 1
+    assert push_all(buffer, [744]) == [744, 745]
+    assert buffer.snapshot()['reordered'] == 1
+
+
+def test_gap_is_skipped_once_the_wait_expires():
+    buffer = ReorderBuffer(max_wait=2.0)
+    push_all(buffer, [743, 746, 747], now=0.0)
+    assert buffer.flush_expired(now=1.9) == []
+    assert buffer.flush_expired(now=2.0) == [746, 747]
+    assert buffer.snapshot()['gaps'] == 1
+    assert buffer.snapshot()['missing_games'] == 2
+
+
+def test_counter_restart_drains_and_follows_the_new_sequence():
+    buffer = ReorderBuffer(max_wait=2.0, reset_gap=100)
+    push_all(buffer, [1440, 1442])
+    # A small step back is a late repeat, a large one is a new counter
+    assert push_all(buffer, [1435]) == [1435]
+    assert push_all(buffer, [1, 2]) == [1442, 1, 2]
+    assert buffer.pending() == 0
+
+
+def test_too_many_held_games_skip_the_gap_without_waiting():
+    buffer = ReorderBuffer(max_wait=60.0, max_held=3)
+    push_all(buffer, [10])
+    assert push_all(buffer, [12, 13, 14]) == []
+    assert push_all(buffer, [15]) == [12, 13, 14, 15]
+    assert buffer.pending() == 0
+
+
+def test_messages_without_game_number_pass_straight_through():
+    buffer = ReorderBuffer()
+    push_all(buffer, [5, 7])
+    assert buffer.push(CHAT, None, 'hello') == ['hello']
@@ -0,0 +1,38 @@
+"""
+Behavior checks for shadow strategies and suit mapping across rule reloads
+"""
+
+from card_predictor import parse_game_message
+from event_log import _counts
+from prediction_rules import compile_rules, default_rules
+from shadow import ShadowStrategy
+
+MESSAGE = '#N9. 3(K♠️10♥️5♦️) - 2(A♣️A♣️)'
+
+
+def reordered_rules():
+    """Default rules with the suits in another order plus an extra symbol"""
+    rules = default_rules()
+    return compile_rules(['♣️', '♦️', '🃏', '♠️', '♥️'], rules.valid_combinations,
+                         rules.temporary_emojis, rules.final_emojis, rules.prediction_message)
+
+
+def test_event_log_columns_keep_their_suits_when_symbols_are_reordered():
+    default = parse_game_message(MESSAGE)
+    reordered = parse_game_message(MESSAGE, reordered_rules())
+    assert reordered.suit_counts != default.suit_counts
+    for group in (0, 1):
+        assert _counts(reordered, group) == _counts(default, group)
+    assert _counts(default, 0) == (1, 1, 1, 0)  # ♥️ ♠️ ♦️ ♣️
+    assert _counts(default, 1) == (0, 0, 0, 2)
+
+
+def test_shadow_combination_filter_follows_reloaded_symbols():
+    for rules in (default_rules(), reordered_rules()):
+        allowed = ShadowStrategy('filtre', combinations=['♦️♠️♥️'])
+        other = ShadowStrategy('autre', combinations=['♣️♠️♥️'])
+        parsed = parse_game_message(MESSAGE, rules)
+        allowed.observe(parsed)
+        other.observe(parsed)
+        assert allowed.pending == {10: frozenset({'♥️', '♠️', '♦️'})}
+        assert other.pending == {}
@@ -0,0 +1,64 @@
+"""
+Behavior checks for the prediction state journal and its replay
+"""
+
+from card_predictor import CardPredictor
+from state_store import JournalFollower, StateJournal
+
+
+def leader_and_standby(tmp_path):
+    journal_path = str(tmp_path / 'state.jsonl')
+    leader = CardPredictor()
+    leader.journal = StateJournal(journal_path)
+    standby = CardPredictor()
+    return leader, standby, JournalFollower(StateJournal(journal_path), standby)
+
+
+def test_standby_replays_predictions_verifications_and_sent_copies(tmp_path):
+    leader, standby, follower = leader_and_standby(tmp_path)
+    leader.make_prediction(9, '♠️♥️♦️')
+    leader.record_sent(10, [(-200, 1)])
+    leader.record_sent(10, [(-300, 2)])  # a slower channel confirms later
+    leader.make_prediction(19, '♠️♣️♦️')
+    leader.verify_prediction('#N10. ✅3(J♠️Q♠️9♠️) - 2(A♣️K♣️)')
+
+    assert follower.catch_up() == 5
+    assert standby.predictions[10].status == 'correct'
+    assert standby.predictions[10].verification_count == 0
+    assert standby.predictions[20].status == 'pending'
+    assert standby.sent_predictions[10] == [(-200, 1), (-300, 2)]
+    assert standby.predictions[10].final_message == leader.predictions[10].final_message
+
+    # Only changes written since the last call are applied
+    leader.make_prediction(29, '♠️♥️♣️')
+    assert follower.catch_up() == 1
+    assert 30 in standby.predictions
+
+
+def test_archived_run_is_replayed_with_its_totals(tmp_path):
+    leader, standby, follower = leader_and_standby(tmp_path)
+    leader.make_prediction(9, '♠️♥️♦️')
+    leader.verify_prediction('#N10. ✅3(J♠️Q♠️9♠️) - 2(A♣️K♣️)')
+    leader.archive_predictions()
+    leader.make_prediction(9, '♠️♥️♣️')
+
+    follower.catch_up()
+    assert standby.predictions[10].combination == '♠️♥️♣️'
+    assert standby.predictions[10].status == 'pending'
+    assert standby.get_prediction_stats() == leader.get_prediction_stats()
+
+
+def test_partial_trailing_line_is_read_once_complete(tmp_path):
+    path = tmp_path / 'state.jsonl'
+    journal = StateJournal(str(path))
+    journal.append({'t': 'predict', 'g': 10, 'c': '♠️♥️♦️'})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"t":"predict","g":20,')  # the leader is mid-write
+
+    changes, offset = journal.read_from(0)
+    assert [change['g'] for change in changes] == [10]
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('"c":"♠️♣️♦️"}\n')
+    changes, _ = journal.read_from(offset)
+    assert [change['g'] for change in changes] == [20]